@@ -0,0 +1,13 @@
+# src/asset_loader.py
+from functools import lru_cache
+import orjson
+
+
+@lru_cache(maxsize=None)
+def load_asset_json(path: str) -> dict:
+    """
+    Loads a local JSON asset (prompt config, schema, template) and caches it per process.
+    The returned object is shared between all callers and must be treated as read-only.
+    """
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
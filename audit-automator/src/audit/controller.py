@@ -1,7 +1,7 @@
 # src/audit/controller.py
 import logging
-import json
 import asyncio
+import orjson
 from typing import List, Dict, Any, Optional, Tuple
 from collections import defaultdict
 from google.cloud.exceptions import NotFound
@@ -168,9 +168,10 @@ class AuditController:
                 findings_with_ids.append(finding_with_id)
 
         findings_path = f"{self.config.output_prefix}results/all_findings.json"
-        self.gcs_client.upload_from_string(
-            content=json.dumps(findings_with_ids, indent=2, ensure_ascii=False),
-            destination_blob_name=findings_path
+        self.gcs_client.upload_from_bytes(
+            content=orjson.dumps(findings_with_ids, option=orjson.OPT_INDENT_2),
+            destination_blob_name=findings_path,
+            content_type='application/json'
         )
         logging.info(f"Successfully saved {len(findings_with_ids)} findings with sequential IDs to {findings_path}")
 
@@ -244,8 +245,11 @@ class AuditController:
         if not force_overwrite:
             try:
                 if stage_name == "Grundschutz-Check-Extraction":
-                    if self.gcs_client.blob_exists(EXTRACTED_CHECK_DATA_PATH) and \
-                       self.gcs_client.blob_exists(GROUND_TRUTH_MAP_PATH):
+                    artifacts_exist = await asyncio.gather(
+                        self.gcs_client.blob_exists_async(EXTRACTED_CHECK_DATA_PATH),
+                        self.gcs_client.blob_exists_async(GROUND_TRUTH_MAP_PATH)
+                    )
+                    if all(artifacts_exist):
                         logging.info(f"Stage '{stage_name}' already completed (intermediate files exist). Skipping.")
                         result_data = {"status": "skipped", "reason": "intermediate files found"}
                 else:
@@ -272,9 +276,10 @@ class AuditController:
                 result_data = await stage_runner.run(force_overwrite=force_overwrite)
 
                 if stage_name != "Grundschutz-Check-Extraction":
-                    self.gcs_client.upload_from_string(
-                        content=json.dumps(result_data, indent=2, ensure_ascii=False),
-                        destination_blob_name=stage_output_path
+                    self.gcs_client.upload_from_bytes(
+                        content=orjson.dumps(result_data, option=orjson.OPT_INDENT_2),
+                        destination_blob_name=stage_output_path,
+                        content_type='application/json'
                     )
                     logging.info(f"Successfully saved results for stage '{stage_name}'.")
             except Exception as e:
@@ -1,7 +1,7 @@
 # src/audit/report_generator.py
 import logging
-import json
 import asyncio
+import orjson
 from google.cloud.exceptions import NotFound
 from typing import Dict, Any, List
 from jsonschema import validate, ValidationError
@@ -26,8 +26,8 @@ class ReportGenerator:
     def _load_report_schema(self) -> Dict[str, Any]:
         """Loads the master template to use as a validation schema."""
         try:
-            with open(self.LOCAL_MASTER_TEMPLATE_PATH, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with open(self.LOCAL_MASTER_TEMPLATE_PATH, 'rb') as f:
+                return orjson.loads(f.read())
         except Exception as e:
             logging.error(f"FATAL: Could not load the master report schema from {self.LOCAL_MASTER_TEMPLATE_PATH}. Error: {e}")
             raise
@@ -87,8 +87,8 @@ class ReportGenerator:
         """
         logging.info(f"Loading pristine report template from local asset: {self.LOCAL_MASTER_TEMPLATE_PATH}")
         try:
-            with open(self.LOCAL_MASTER_TEMPLATE_PATH, 'r', encoding='utf-8') as f:
-                report = json.load(f)
+            with open(self.LOCAL_MASTER_TEMPLATE_PATH, 'rb') as f:
+                report = orjson.loads(f.read())
             
             # Inject dynamic configuration into the fresh template
             self._set_value_by_path(report, 'bsiAuditReport.allgemeines.audittyp.content', self.config.audit_type)
@@ -156,9 +156,10 @@ class ReportGenerator:
         today = datetime.now()
         date_str = today.strftime("%y%m%d")
         final_report_path = f"{self.config.output_prefix}results/report_{date_str}.json"
-        await self.gcs_client.upload_from_string_async(
-            content=json.dumps(report, indent=2, ensure_ascii=False),
-            destination_blob_name=final_report_path
+        await self.gcs_client.upload_from_bytes_async(
+            content=orjson.dumps(report, option=orjson.OPT_INDENT_2),
+            destination_blob_name=final_report_path,
+            content_type='application/json'
         )
         logging.info(f"Saving final report to {final_report_path}")
         
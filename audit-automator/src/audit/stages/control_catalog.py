@@ -1,6 +1,6 @@
 # src/audit/stages/control_catalog.py
 import logging
-import json
+import orjson
 from typing import List, Dict, Any, Optional
 
 class ControlCatalog:
@@ -19,8 +19,8 @@ class ControlCatalog:
 
     def _load_and_parse_catalog(self):
         """Loads the JSON catalog and builds an efficient lookup map."""
-        with open(self.catalog_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with open(self.catalog_path, 'rb') as f:
+            data = orjson.loads(f.read())
 
         catalog = data.get("catalog", {})
         # Layers like 'ISMS', 'ORP', 'INF', etc.
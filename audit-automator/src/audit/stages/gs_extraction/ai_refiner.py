@@ -1,13 +1,14 @@
 # bsi-audit-automator/src/audit/stages/gs_extraction/ai_refiner.py
 import logging
-import json
 import asyncio
-import os
+import orjson
 from typing import Dict, Any, List, Tuple, Optional
 
-from src.clients.ai_client import AiClient
+from src.config import AppConfig
+from src.clients.ai_client import AiClient, JSON_PARSE_ERROR_PREFIX
 from src.clients.gcs_client import GcsClient
 from src.constants import GROUPED_BLOCKS_PATH, EXTRACTED_CHECK_DATA_PATH, CHUNK_PROCESSING_MODEL, GROUND_TRUTH_MODEL, PROMPT_CONFIG_PATH
+from src.asset_loader import load_asset_json
 
 from .cache_manager import CacheManager
 from .chunk_processor import ChunkProcessor
@@ -20,28 +21,29 @@ class AiRefiner:
     Delegates specific responsibilities to specialized components.
     """
 
-    def __init__(self, ai_client: AiClient, gcs_client: GcsClient):
+    # Upper bound for Zielobjekt groups in flight; AI calls themselves are limited by the AiClient
+    MAX_CONCURRENT_GROUPS = 16
+
+    def __init__(self, ai_client: AiClient, gcs_client: GcsClient, config: AppConfig):
         self.ai_client = ai_client
         self.gcs_client = gcs_client
+        self.config = config
+        self.group_semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_GROUPS)
         self.cache_manager = CacheManager(gcs_client)
         self.chunk_processor = ChunkProcessor()
         self.data_processor = DataProcessor()
-        self.prompt_config = self._load_asset_json(PROMPT_CONFIG_PATH)
-
-    def _load_asset_json(self, path: str) -> dict:
-        """Load JSON configuration from assets."""
-        with open(path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        self.prompt_config = load_asset_json(PROMPT_CONFIG_PATH)
 
-    async def refine_grouped_blocks_with_ai(self, system_map: Dict[str, Any], force_overwrite: bool):
+    async def refine_grouped_blocks_with_ai(self, system_map: Dict[str, Any], output_exists: bool):
         """
         Process grouped blocks with AI to extract structured requirements.
         
         Args:
             system_map: Ground truth map containing zielobjekte information
-            force_overwrite: If True, reprocess even if output exists
+            output_exists: True if the extracted check data file exists and may be reused
+                (checked up front by the runner, False when overwriting is forced)
         """
-        if not force_overwrite and self.gcs_client.blob_exists(EXTRACTED_CHECK_DATA_PATH):
+        if output_exists:
             logging.info(f"Final extracted check results file exists. Skipping AI refinement.")
             return
 
@@ -52,8 +54,8 @@ class AiRefiner:
         groups = grouped_blocks_data.get("zielobjekt_grouped_blocks", {})
         
         refine_config = self.prompt_config["stages"]["Chapter-3"]["refine_layout_parser_group"]
-        prompt_template = refine_config["prompt"]
-        schema = self._load_asset_json(refine_config["schema_path"])
+        prompt_parts = self._split_prompt_template(refine_config["prompt"])
+        schema = load_asset_json(refine_config["schema_path"])
         
         zielobjekt_map = {z['kuerzel']: z['name'] for z in system_map.get("zielobjekte", [])}
 
@@ -65,7 +67,7 @@ class AiRefiner:
             final_output = {"anforderungen": []}
         else:
             # Apply test mode limiting
-            if os.getenv("TEST", "false").lower() == "true":
+            if self.config.is_test_mode:
                 limited_groups = dict(list(valid_groups.items())[:3])
                 logging.info(f"Test mode: Processing only {len(limited_groups)} of {len(valid_groups)} groups")
                 valid_groups = limited_groups
@@ -73,49 +75,57 @@ class AiRefiner:
             logging.info(f"Processing {len(valid_groups)} Zielobjekt groups...")
             
             # Process all groups
-            results = await self._process_all_groups(valid_groups, zielobjekt_map, prompt_template, schema)
+            results = await self._process_all_groups(valid_groups, zielobjekt_map, prompt_parts, schema)
             
             # Assemble final results
             final_output = self.data_processor.assemble_final_results(results)
         
         # Save consolidated results
-        await self.gcs_client.upload_from_string_async(
-            json.dumps(final_output, indent=2, ensure_ascii=False), 
-            EXTRACTED_CHECK_DATA_PATH
+        await self.gcs_client.upload_from_bytes_async(
+            orjson.dumps(final_output, option=orjson.OPT_INDENT_2),
+            EXTRACTED_CHECK_DATA_PATH,
+            content_type='application/json'
         )
         logging.info(f"Saved final refined check data with {len(final_output['anforderungen'])} requirements")
 
     async def _process_all_groups(self, valid_groups: Dict[str, List[Dict]], zielobjekt_map: Dict[str, str], 
-                                 prompt_template: str, schema: Dict[str, Any]) -> List[Tuple[str, str, Optional[Dict[str, Any]]]]:
-        """Process all valid groups concurrently."""
+                                 prompt_parts: Tuple[str, str], schema: Dict[str, Any]) -> List[Tuple[str, str, Optional[Dict[str, Any]]]]:
+        """Process all valid groups concurrently, with at most MAX_CONCURRENT_GROUPS in flight."""
+        async def process_group_bounded(kuerzel: str, blocks: List[Dict]):
+            async with self.group_semaphore:
+                return await self._process_group_with_caching(kuerzel, blocks, zielobjekt_map, prompt_parts, schema)
+
         tasks = [
-            self._process_group_with_caching(kuerzel, blocks, zielobjekt_map, prompt_template, schema) 
+            process_group_bounded(kuerzel, blocks) 
             for kuerzel, blocks in valid_groups.items()
         ]
         return await asyncio.gather(*tasks)
 
     async def _process_group_with_caching(self, kuerzel: str, blocks: List[Dict], zielobjekt_map: Dict[str, str], 
-                                         prompt_template: str, schema: Dict[str, Any]) -> Tuple[str, str, Optional[Dict[str, Any]]]:
+                                         prompt_parts: Tuple[str, str], schema: Dict[str, Any]) -> Tuple[str, str, Optional[Dict[str, Any]]]:
         """Process a single group with caching support."""
         name = zielobjekt_map.get(kuerzel, "Unbekannt")
         
         # Check for cached result first
         cached_result = await self.cache_manager.get_cached_result(kuerzel)
         if cached_result is not None:
+            # Results cached by earlier versions may not be tagged yet
+            self.data_processor.tag_requirements(cached_result, kuerzel, name)
             return kuerzel, name, cached_result
         
         try:
-            # Process with chunking if needed
-            chunks = self.chunk_processor.chunk_blocks(blocks)
+            # Preprocess the group's blocks once, then chunk if needed
+            clean_blocks = self.chunk_processor.preprocess_blocks_for_ai(blocks)
+            chunks = self.chunk_processor.chunk_blocks(clean_blocks)
             
             if len(chunks) == 1:
                 # Single chunk - process normally
-                result = await self._process_single_chunk(kuerzel, chunks[0], 0, 1, prompt_template, schema)
+                result = await self._process_single_chunk(kuerzel, chunks[0], 0, 1, prompt_parts, schema)
             else:
                 # Multiple chunks - process each and merge results
                 logging.info(f"Processing {len(chunks)} chunks for Zielobjekt '{kuerzel}'")
                 chunk_tasks = [
-                    self._process_single_chunk(kuerzel, chunk, idx, len(chunks), prompt_template, schema) 
+                    self._process_single_chunk(kuerzel, chunk, idx, len(chunks), prompt_parts, schema) 
                     for idx, chunk in enumerate(chunks)
                 ]
                 chunk_results = await asyncio.gather(*chunk_tasks)
@@ -129,8 +139,9 @@ class AiRefiner:
                 result = {"anforderungen": all_anforderungen}
                 logging.info(f"Merged {len(all_anforderungen)} requirements from {len(chunks)} chunks for '{kuerzel}'")
             
-            # Cache the result
+            # Tag requirements with their Zielobjekt and cache the result in its final shape
             if result:
+                self.data_processor.tag_requirements(result, kuerzel, name)
                 await self.cache_manager.save_result_to_cache(kuerzel, result)
             
             return kuerzel, name, result
@@ -139,19 +150,17 @@ class AiRefiner:
             logging.error(f"Complete processing failed for Zielobjekt '{kuerzel}': {e}")
             return kuerzel, name, None
 
-    async def _process_single_chunk(self, kuerzel: str, chunk: List[Dict], chunk_idx: int, total_chunks: int,
-                                   prompt_template: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    async def _process_single_chunk(self, kuerzel: str, clean_chunk: List[Dict], chunk_idx: int, total_chunks: int,
+                                   prompt_parts: Tuple[str, str], schema: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Process a single chunk with the 2+2 attempt pattern.
+        Process a single chunk of preprocessed blocks with the 2+2 attempt pattern.
         """
-        # Preprocess blocks
-        clean_chunk = self.chunk_processor.preprocess_blocks_for_ai(chunk)
-        
-        # Build prompt
-        prompt = self._build_chunk_prompt(clean_chunk, chunk_idx, total_chunks, prompt_template)
+        # Build prompt (compact JSON: indentation only adds prompt tokens, the model does not need it)
+        blocks_json = orjson.dumps(clean_chunk).decode()
+        prompt = self._build_chunk_prompt(blocks_json, chunk_idx, total_chunks, prompt_parts)
         
         # Log chunk info
-        total_chars = sum(len(str(block)) for block in clean_chunk)
+        total_chars = len(blocks_json)
         chunk_info = f"chunk {chunk_idx + 1}/{total_chunks} for '{kuerzel}' ({len(clean_chunk)} blocks, ~{total_chars:,} chars)"
         logging.info(f"Processing {chunk_info}")
         
@@ -187,8 +196,21 @@ class AiRefiner:
         logging.error(f"❌ All 4 attempts failed for {chunk_info}. Returning empty result.")
         return {"anforderungen": []}
 
-    def _build_chunk_prompt(self, clean_chunk: List[Dict], chunk_idx: int, total_chunks: int, prompt_template: str) -> str:
-        """Build the prompt for a chunk."""
+    @staticmethod
+    def _split_prompt_template(prompt_template: str) -> Tuple[str, str]:
+        """
+        Split the refinement prompt template around its blocks placeholder once, so each
+        chunk prompt is a plain string join instead of a str.format call on the full template.
+        Escaped braces are resolved the same way str.format would.
+        """
+        head, tail = prompt_template.split("{zielobjekt_blocks_json}", 1)
+        return (
+            head.replace("{{", "{").replace("}}", "}"),
+            tail.replace("{{", "{").replace("}}", "}"),
+        )
+
+    def _build_chunk_prompt(self, blocks_json: str, chunk_idx: int, total_chunks: int, prompt_parts: Tuple[str, str]) -> str:
+        """Build the prompt for a chunk from its serialized blocks."""
         chunk_context = ""
         if total_chunks > 1:
             chunk_context = (
@@ -197,7 +219,8 @@ class AiRefiner:
                 f"from these specific blocks, avoiding duplication of requirements found in overlapping sections."
             )
         
-        return prompt_template.format(zielobjekt_blocks_json=json.dumps(clean_chunk, indent=2)) + chunk_context
+        head, tail = prompt_parts
+        return "".join((head, blocks_json, tail, chunk_context))
 
     async def _try_model_with_retries(self, model_name: str, model_display_name: str, prompt: str, 
                                      schema: Dict[str, Any], chunk_info: str, attempts: int) -> Optional[Dict[str, Any]]:
@@ -240,7 +263,7 @@ class AiRefiner:
         """Classify the error into a concise, readable format."""
         error_str = str(error)
         
-        if "Unterminated string" in error_str or "JSONDecodeError" in error_str:
+        if error_str.startswith(JSON_PARSE_ERROR_PREFIX):
             return "JSON parsing error"
         elif "token" in error_str.lower() or "context length" in error_str.lower():
             return "Token limit exceeded"
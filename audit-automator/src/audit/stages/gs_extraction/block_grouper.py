@@ -1,13 +1,16 @@
 # bsi-audit-automator/src/audit/stages/gs_extraction/block_grouper.py
 import logging
-import json
-import sys
-from typing import Dict, Any, List
-from collections import defaultdict
+import asyncio
+import ijson
+import orjson
+from typing import Dict, Any, List, Iterable, Tuple
+from collections import defaultdict, Counter
 
 from src.clients.gcs_client import GcsClient
 from src.constants import FINAL_MERGED_LAYOUT_PATH, GROUPED_BLOCKS_PATH
 
+from .layout_blocks import iter_blocks_depth_first
+
 
 class BlockGrouper:
     """
@@ -18,99 +21,100 @@ class BlockGrouper:
     def __init__(self, gcs_client: GcsClient):
         self.gcs_client = gcs_client
 
-    async def group_layout_blocks_by_zielobjekt(self, system_map: Dict[str, Any], force_overwrite: bool):
+    async def group_layout_blocks_by_zielobjekt(self, system_map: Dict[str, Any], output_exists: bool):
         """
         Group layout blocks by Zielobjekt using a robust marker-based algorithm.
         
         Args:
             system_map: Ground truth map containing zielobjekte list
-            force_overwrite: If True, reprocess even if output exists
+            output_exists: True if the grouped blocks file exists and may be reused
+                (checked up front by the runner, False when overwriting is forced)
         """
-        if not force_overwrite and self.gcs_client.blob_exists(GROUPED_BLOCKS_PATH):
+        if output_exists:
             logging.info(f"Grouped layout blocks file already exists. Skipping grouping.")
             return
 
         logging.info("Grouping layout blocks by Zielobjekt context using marker-based algorithm...")
         
-        # Load layout data
-        layout_data = await self.gcs_client.read_json_async(FINAL_MERGED_LAYOUT_PATH)
-        all_blocks = layout_data.get("documentLayout", {}).get("blocks", [])
+        # Parsing, grouping and serialization are CPU-bound; keep them off the event loop
+        grouped_blocks_json = await asyncio.to_thread(self._compute_grouped_blocks_json, system_map)
+
+        # Save grouped blocks
+        await self.gcs_client.upload_from_bytes_async(
+            grouped_blocks_json,
+            GROUPED_BLOCKS_PATH,
+            content_type='application/json'
+        )
+        logging.info(f"Saved grouped layout blocks to {GROUPED_BLOCKS_PATH}")
 
+    def _compute_grouped_blocks_json(self, system_map: Dict[str, Any]) -> bytes:
+        """
+        Builds the grouped blocks artifact (runs in a worker thread).
+        
+        Args:
+            system_map: Ground truth map containing zielobjekte list
+            
+        Returns:
+            The serialized {"zielobjekt_grouped_blocks": {...}} JSON document
+        """
         # Initialize grouping structures
         grouped_blocks = defaultdict(list)
         
-        # Flatten all blocks for consistent processing
-        all_flattened_blocks = self._flatten_all_blocks(all_blocks)
-        block_id_to_block_map = {int(b['blockId']): b for b in all_flattened_blocks}
-
-        # Find Zielobjekt markers in the document
-        markers = self._find_zielobjekt_markers(all_flattened_blocks, system_map)
+        # Stream the layout from GCS, index all blocks by ID and find Zielobjekt markers in one pass
+        block_id_to_block_map, markers = self._load_block_index_and_markers(system_map)
         
         if not markers:
             # If no markers found, all blocks are ungrouped
             logging.warning("No Zielobjekt markers found in document. All blocks will be marked as ungrouped.")
-            sys.exit()
+            grouped_blocks["_UNGROUPED_"] = list(block_id_to_block_map.values())
         else:
             # Group blocks based on marker positions
             self._group_blocks_by_markers(markers, block_id_to_block_map, grouped_blocks)
 
-        # Save grouped blocks
-        await self.gcs_client.upload_from_string_async(
-            json.dumps({"zielobjekt_grouped_blocks": dict(grouped_blocks)}, indent=2, ensure_ascii=False),
-            GROUPED_BLOCKS_PATH
-        )
-        logging.info(f"Saved grouped layout blocks to {GROUPED_BLOCKS_PATH}")
+        return orjson.dumps({"zielobjekt_grouped_blocks": dict(grouped_blocks)}, option=orjson.OPT_INDENT_2)
 
-    def _flatten_all_blocks(self, blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Flatten all blocks into a single list with hierarchical structure removed."""
-        flattened = []
-        
-        def flatten_recursive(block_list):
-            for block in block_list:
-                # Add current block to flattened list
-                flattened.append(block)
-                
-                # Process nested textBlock.blocks
-                if 'textBlock' in block and 'blocks' in block['textBlock']:
-                    flatten_recursive(block['textBlock']['blocks'])
-                
-                # Process table blocks
-                if 'tableBlock' in block:
-                    for row_type in ['headerRows', 'bodyRows']:
-                        for row in block['tableBlock'].get(row_type, []):
-                            for cell in row.get('cells', []):
-                                if 'blocks' in cell:
-                                    flatten_recursive(cell['blocks'])
-        
-        flatten_recursive(blocks)
-        return flattened
+    def _load_block_index_and_markers(self, system_map: Dict[str, Any]) -> Tuple[Dict[int, Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Stream-parses the merged layout file and indexes its blocks. Only the block
+        array is materialized; the document-wide 'text' field is never loaded.
+        """
+        with self.gcs_client.open_blob_reader(FINAL_MERGED_LAYOUT_PATH) as reader:
+            top_level_blocks = ijson.items(reader, "documentLayout.blocks.item", use_float=True)
+            return self._index_blocks_and_find_markers(top_level_blocks, system_map)
 
-    def _find_zielobjekt_markers(self, all_flattened_blocks: List[Dict[str, Any]], system_map: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Find Zielobjekt markers in the flattened blocks."""
+    def _index_blocks_and_find_markers(self, blocks: Iterable[Dict[str, Any]],
+                                       system_map: Dict[str, Any]) -> Tuple[Dict[int, Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Flatten all blocks into a block ID -> block map and find Zielobjekt markers in the same pass.
+        Blocks are visited in document order (each block before its nested blocks), so the map
+        is ordered by block ID.
+        """
         zielobjekte = system_map.get("zielobjekte", [])
         kuerzel_list = [item['name'] for item in zielobjekte if 'name' in item]
         if "informationsverbund_name" in system_map:
             kuerzel_list.append(system_map["informationsverbund_name"])
 
-        remaining_kuerzel = kuerzel_list.copy()
+        # Lookup of kürzel still to be found; each listed occurrence is matched once.
+        remaining_kuerzel = Counter(kuerzel_list)
         markers = []
+        block_id_to_block_map = {}
         
-        # Search for exact matches of Zielobjekt kürzel in block text
-        for block in all_flattened_blocks:
+        for block in iter_blocks_depth_first(blocks):
+            block_id = int(block['blockId'])
+            block_id_to_block_map[block_id] = block
+            
+            # Exact match of a Zielobjekt kürzel in the block text (one hash lookup per block)
             direct_text = ""
             if 'textBlock' in block and 'text' in block['textBlock']:
                 direct_text = block['textBlock']['text'].strip()
             
-            if direct_text:
-                for kuerzel in remaining_kuerzel.copy():
-                    if direct_text == kuerzel:
-                        block_id = int(block.get('blockId', 0))
-                        markers.append({'kuerzel': kuerzel, 'block_id': block_id})
-                        remaining_kuerzel.remove(kuerzel)
-                        break
+            if direct_text and remaining_kuerzel.get(direct_text):
+                markers.append({'kuerzel': direct_text, 'block_id': block_id})
+                remaining_kuerzel[direct_text] -= 1
         
-        logging.info(f"Found {len(markers)} Zielobjekt markers. Unfound kürzel ({len(remaining_kuerzel)}): {remaining_kuerzel}")
-        return markers
+        unfound_kuerzel = list((+remaining_kuerzel).elements())
+        logging.info(f"Found {len(markers)} Zielobjekt markers. Unfound kürzel ({len(unfound_kuerzel)}): {unfound_kuerzel}")
+        return block_id_to_block_map, markers
 
     def _group_blocks_by_markers(self, markers: List[Dict[str, Any]], block_id_to_block_map: Dict[int, Dict[str, Any]], grouped_blocks: defaultdict):
         """Group blocks based on marker positions."""
@@ -118,24 +122,28 @@ class BlockGrouper:
         markers.sort(key=lambda m: m['block_id'])
         logging.info(f"Sorted {len(markers)} Zielobjekt markers.")
 
-        # Get all block IDs in order
-        sorted_block_ids = sorted(block_id_to_block_map.keys())
+        # Block IDs were assigned in document order, so the map is already ordered by ID
+        sorted_block_ids = list(block_id_to_block_map)
+        block_count = len(sorted_block_ids)
+        
+        # Single sweep over the ordered block IDs alongside the sorted markers
+        j = 0
         
         # Handle blocks before first marker (ungrouped)
         first_marker_id = markers[0]['block_id']
-        ungrouped_ids = [bid for bid in sorted_block_ids if bid < first_marker_id]
-        for bid in ungrouped_ids:
-            grouped_blocks["_UNGROUPED_"].append(block_id_to_block_map[bid])
+        while j < block_count and sorted_block_ids[j] < first_marker_id:
+            grouped_blocks["_UNGROUPED_"].append(block_id_to_block_map[sorted_block_ids[j]])
+            j += 1
         
         # Group blocks between consecutive markers
         for i, marker in enumerate(markers):
             start_id = marker['block_id']
-            end_id = markers[i+1]['block_id'] if i + 1 < len(markers) else max(sorted_block_ids) + 1
+            end_id = markers[i+1]['block_id'] if i + 1 < len(markers) else sorted_block_ids[-1] + 1
             
             kuerzel = marker['kuerzel']
-            group_ids = [bid for bid in sorted_block_ids if start_id <= bid < end_id]
-            
-            for bid in group_ids:
-                grouped_blocks[kuerzel].append(block_id_to_block_map[bid])
+            group_start = j
+            while j < block_count and sorted_block_ids[j] < end_id:
+                grouped_blocks[kuerzel].append(block_id_to_block_map[sorted_block_ids[j]])
+                j += 1
             
-            logging.info(f"Assigned {len(group_ids)} blocks to '{kuerzel}' (IDs {start_id}-{end_id-1}).")
\ No newline at end of file
+            logging.info(f"Assigned {j - group_start} blocks to '{kuerzel}' (IDs {start_id}-{end_id-1}).")
@@ -1,5 +1,8 @@
 # bsi-audit-automator/src/audit/stages/gs_extraction/chunk_processor.py
 import logging
+import orjson
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
 from typing import List, Dict
 
 
@@ -8,40 +11,57 @@ class ChunkProcessor:
 
     MAX_BLOCKS_PER_CHUNK = 200
     MIN_BLOCKS_PER_CHUNK = 50
+    # Budget for the serialized JSON size of a chunk (~4 chars per token => roughly 25k input tokens)
+    CHUNK_TARGET_CHAR_SIZE = 100_000
+    # Share of a chunk's serialized size that is repeated at the start of the next chunk
+    CHUNK_OVERLAP_RATIO = 0.10
 
     @staticmethod
-    def chunk_blocks(blocks: List[Dict], max_blocks: int = MAX_BLOCKS_PER_CHUNK) -> List[List[Dict]]:
-        """Split blocks into chunks of manageable size with 10% overlap."""
-        if len(blocks) <= max_blocks:
+    def chunk_blocks(blocks: List[Dict], max_blocks: int = MAX_BLOCKS_PER_CHUNK,
+                     max_chars: int = CHUNK_TARGET_CHAR_SIZE) -> List[List[Dict]]:
+        """
+        Split blocks into chunks of manageable size with 10% overlap.
+        A chunk is closed when it reaches max_blocks or when the next block would push its
+        serialized JSON size over max_chars, so a few very large blocks cannot overflow a prompt.
+        The overlap is measured in serialized size rather than block count, so it carries a
+        similar amount of context whether the trailing blocks are small or large.
+        """
+        # Serialized size of each block, computed once, as prefix sums:
+        # the size of blocks[i:j] is size_prefix[j] - size_prefix[i]
+        size_prefix = [0, *accumulate(len(orjson.dumps(block)) for block in blocks)]
+        total_chars = size_prefix[-1]
+        if len(blocks) <= max_blocks and total_chars <= max_chars:
             return [blocks]
 
-        # Calculate overlap size (10% of max_blocks, minimum 10 blocks, maximum 20 blocks)
-        overlap_size = max(10, min(20, int(max_blocks * 0.10)))
-        
         chunks = []
-        i = 0
-        while i < len(blocks):
-            # Calculate chunk boundaries
-            start_idx = max(0, i - (overlap_size if i > 0 else 0))
-            end_idx = min(len(blocks), i + max_blocks)
-            
-            # Extract chunk with overlap
-            chunk = blocks[start_idx:end_idx]
-            chunks.append(chunk)
+        start_idx = 0
+        while True:
+            # Furthest end within the block and size budget (always at least one block)
+            max_end_idx = min(len(blocks), start_idx + max_blocks)
+            end_idx = bisect_right(size_prefix, size_prefix[start_idx] + max_chars, start_idx + 1, max_end_idx + 1) - 1
+            end_idx = max(end_idx, start_idx + 1)
             
-            # Move to next chunk position (accounting for overlap)
-            i += max_blocks - overlap_size
+            chunks.append(blocks[start_idx:end_idx])
             
             # Break if we've covered all blocks
             if end_idx >= len(blocks):
                 break
+            
+            # Next chunk repeats the trailing blocks of this one up to the overlap budget,
+            # but never more than half of the chunk so that we always advance
+            overlap_budget = (size_prefix[end_idx] - size_prefix[start_idx]) * ChunkProcessor.CHUNK_OVERLAP_RATIO
+            min_start_idx = end_idx - (end_idx - start_idx) // 2
+            start_idx = bisect_left(size_prefix, size_prefix[end_idx] - overlap_budget, min_start_idx, end_idx)
         
-        logging.info(f"Split {len(blocks)} blocks into {len(chunks)} chunks with {overlap_size}-block overlap ({overlap_size/max_blocks*100:.1f}%)")
+        logging.info(f"Split {len(blocks)} blocks (~{total_chars:,} chars) into {len(chunks)} chunks with {ChunkProcessor.CHUNK_OVERLAP_RATIO:.0%} size-based overlap")
         return chunks
 
     @staticmethod
     def preprocess_blocks_for_ai(blocks: List[Dict]) -> List[Dict]:
-        """Preprocess blocks to avoid JSON generation issues."""
+        """
+        Preprocess blocks to avoid JSON generation issues.
+        The input blocks are left untouched; cleaned blocks get their own textBlock copy.
+        """
         processed_blocks = []
         
         for block in blocks:
@@ -50,6 +70,7 @@ class ChunkProcessor:
             
             # Clean text content to prevent JSON issues
             if 'textBlock' in clean_block and 'text' in clean_block['textBlock']:
+                clean_block['textBlock'] = clean_block['textBlock'].copy()
                 text = clean_block['textBlock']['text']
                 # Remove or escape problematic characters
                 text = text.replace('\r\n', ' ').replace('\n', ' ').replace('\r', ' ')
@@ -1,7 +1,6 @@
 # bsi-audit-automator/src/audit/stages/gs_extraction/data_processor.py
 import logging
-from typing import List, Dict, Any, Tuple
-from collections import defaultdict
+from typing import List, Dict, Any, Tuple, Iterable
 from datetime import datetime
 
 
@@ -9,19 +8,23 @@ class DataProcessor:
     """Handles data processing operations including deduplication and quality scoring."""
 
     @staticmethod
-    def deduplicate_requirements(all_anforderungen: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def deduplicate_requirements(all_anforderungen: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Deduplicates requirements based on (id, zielobjekt_kuerzel) composite key.
         For duplicates, selects the version with the highest quality score.
         
         Args:
-            all_anforderungen: List of all extracted requirements (may contain duplicates)
+            all_anforderungen: Iterable of all extracted requirements (may contain duplicates)
             
         Returns:
             List of deduplicated requirements with highest quality versions retained
         """
-        # Group requirements by composite key
-        requirement_groups = defaultdict(list)
+        # Single pass: keep the best version per composite key as requirements stream in.
+        # Each entry is [best_requirement, best_score, version_count]; the score is only
+        # computed once a key actually has a duplicate.
+        best_by_key = {}
+        calculate_score = DataProcessor._calculate_quality_score
+        
         for req in all_anforderungen:
             req_id = req.get('id')
             zielobjekt_kuerzel = req.get('zielobjekt_kuerzel')
@@ -32,23 +35,28 @@ class DataProcessor:
                 continue
                 
             composite_key = (req_id, zielobjekt_kuerzel)
-            requirement_groups[composite_key].append(req)
+            entry = best_by_key.get(composite_key)
+            if entry is None:
+                best_by_key[composite_key] = [req, None, 1]
+                continue
+            
+            # Duplicate found - retain the higher quality version (first one wins on ties)
+            if entry[1] is None:
+                entry[1] = calculate_score(entry[0])
+            quality_score = calculate_score(req)
+            if quality_score > entry[1]:
+                entry[0] = req
+                entry[1] = quality_score
+            entry[2] += 1
         
         deduplicated = []
         duplicate_count = 0
         
-        for composite_key, req_list in requirement_groups.items():
-            if len(req_list) == 1:
-                # No duplicates for this key
-                deduplicated.append(req_list[0])
-            else:
-                # Multiple versions found - select best quality
-                duplicate_count += len(req_list) - 1
-                best_req = DataProcessor._select_best_requirement_version(req_list)
-                deduplicated.append(best_req)
-                
-                req_id, zielobjekt_kuerzel = composite_key
-                logging.info(f"Resolved {len(req_list)} duplicates for requirement '{req_id}' on '{zielobjekt_kuerzel}'")
+        for (req_id, zielobjekt_kuerzel), (best_req, _, version_count) in best_by_key.items():
+            deduplicated.append(best_req)
+            if version_count > 1:
+                duplicate_count += version_count - 1
+                logging.info(f"Resolved {version_count} duplicates for requirement '{req_id}' on '{zielobjekt_kuerzel}'")
         
         logging.info(f"Deduplication complete: {duplicate_count} duplicates removed, {len(deduplicated)} unique requirements retained")
         return deduplicated
@@ -105,30 +113,18 @@ class DataProcessor:
         return min(score, 1.0)  # Cap at 1.0
 
     @staticmethod
-    def _select_best_requirement_version(requirement_versions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def tag_requirements(result_data: Dict[str, Any], kuerzel: str, name: str) -> None:
         """
-        Selects the best version from a list of duplicate requirements.
+        Tags every requirement of a group result with its Zielobjekt kürzel and name (in place).
         
         Args:
-            requirement_versions: List of requirement dictionaries (duplicates)
-            
-        Returns:
-            The requirement version with the highest quality score
+            result_data: Group result containing an 'anforderungen' list
+            kuerzel: Kürzel of the Zielobjekt the group belongs to
+            name: Name of the Zielobjekt
         """
-        if len(requirement_versions) == 1:
-            return requirement_versions[0]
-        
-        # Calculate quality scores for all versions
-        scored_versions = []
-        for req in requirement_versions:
-            quality_score = DataProcessor._calculate_quality_score(req)
-            scored_versions.append((quality_score, req))
-        
-        # Sort by quality score (highest first) and return best version
-        scored_versions.sort(key=lambda x: x[0], reverse=True)
-        best_req = scored_versions[0][1]
-        
-        return best_req
+        zielobjekt_tags = {'zielobjekt_kuerzel': kuerzel, 'zielobjekt_name': name}
+        for anforderung in result_data.get("anforderungen", []):
+            anforderung.update(zielobjekt_tags)
 
     @staticmethod
     def assemble_final_results(results: List[Tuple[str, str, Any]]) -> Dict[str, List[Dict]]:
@@ -136,7 +132,7 @@ class DataProcessor:
         Assemble final results from all processed groups with robust deduplication.
         
         Args:
-            results: List of tuples (kuerzel, name, result_data)
+            results: List of tuples (kuerzel, name, result_data) with tagged requirements
             
         Returns:
             Dictionary with deduplicated anforderungen list
@@ -147,10 +143,8 @@ class DataProcessor:
         
         for kuerzel, name, result_data in results:
             if result_data and "anforderungen" in result_data:
-                for anforderung in result_data["anforderungen"]:
-                    anforderung['zielobjekt_kuerzel'] = kuerzel
-                    anforderung['zielobjekt_name'] = name
-                    all_anforderungen.append(anforderung)
+                # Requirements are already tagged with their Zielobjekt by the refiner
+                all_anforderungen.extend(result_data["anforderungen"])
                 successful_count += 1
             else:
                 failed_count += 1
@@ -1,9 +1,13 @@
 # bsi-audit-automator/src/audit/stages/gs_extraction/document_processor.py
 import logging
-import json
 import asyncio
+import os
+import shutil
+import tempfile
+import ijson
+import orjson
 import fitz  # PyMuPDF
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 
 from src.config import AppConfig
 from src.clients.gcs_client import GcsClient
@@ -11,6 +15,8 @@ from src.clients.document_ai_client import DocumentAiClient
 from src.clients.rag_client import RagClient
 from src.constants import FINAL_MERGED_LAYOUT_PATH, DOC_AI_CHUNK_RESULTS_PREFIX, TEMP_PDF_CHUNKS_PREFIX
 
+from .layout_blocks import iter_blocks_depth_first
+
 
 class DocumentProcessor:
     """
@@ -19,22 +25,28 @@ class DocumentProcessor:
     """
 
     PAGE_CHUNK_SIZE = 100
+    # Upper bound for PDF chunks built but not yet uploaded (bounds temp disk usage and concurrent uploads)
+    MAX_CONCURRENT_CHUNK_UPLOADS = 8
+    # Merged output is kept in memory up to this size before spilling to disk
+    MERGE_SPOOL_MAX_BYTES = 64 * 1024 * 1024
+    # Size of each read from a chunk result while stream-parsing it
+    MERGE_STREAM_READ_SIZE = 1024 * 1024
 
     def __init__(self, gcs_client: GcsClient, doc_ai_client: DocumentAiClient, rag_client: RagClient, config: AppConfig):
         self.gcs_client = gcs_client
         self.doc_ai_client = doc_ai_client
         self.rag_client = rag_client
         self.config = config
-        self.block_counter = 1
 
-    async def execute_layout_parser_workflow(self, force_overwrite: bool):
+    async def execute_layout_parser_workflow(self, output_exists: bool):
         """
         Execute the full Document AI Layout Parser workflow.
         
         Args:
-            force_overwrite: If True, recreate layout even if it already exists
+            output_exists: True if the merged layout file exists and may be reused
+                (checked up front by the runner, False when overwriting is forced)
         """
-        if not force_overwrite and self.gcs_client.blob_exists(FINAL_MERGED_LAYOUT_PATH):
+        if output_exists:
             logging.info(f"Merged layout file already exists. Skipping Layout Parser workflow.")
             return
 
@@ -45,98 +57,185 @@ class DocumentProcessor:
         if not check_uris:
             raise FileNotFoundError("Could not find 'Grundschutz-Check' or 'test.pdf' document.")
         
-        # Download and split PDF
+        # Download the PDF to a temporary file (instead of into memory), split it and start
+        # Document AI processing for each chunk as soon as its upload completes
         source_blob_name = check_uris[0].replace(f"gs://{self.config.bucket_name}/", "")
-        pdf_bytes = self.gcs_client.download_blob_as_bytes(self.gcs_client.bucket.blob(source_blob_name))
-        
-        chunk_count = await self._split_and_upload_pdf(pdf_bytes)
-        
-        # Process all chunks with Document AI
-        await self._process_pdf_chunks(chunk_count)
-        
-        # Merge and finalize results
-        await self._merge_and_save_results(chunk_count)
+        processing_tasks = []
+        try:
+            with tempfile.NamedTemporaryFile(suffix=".pdf") as pdf_file:
+                await self.gcs_client.download_blob_to_filename_async(source_blob_name, pdf_file.name)
+                await self._split_upload_and_process_pdf(pdf_file.name, processing_tasks)
+            
+            # Merge results as they arrive in order
+            await self._merge_and_save_results(processing_tasks)
+        finally:
+            for task in processing_tasks:
+                task.cancel()
 
-    async def _split_and_upload_pdf(self, pdf_bytes: bytes) -> int:
-        """Split PDF into chunks and upload to GCS."""
-        pdf_doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        upload_tasks = []
-        
-        for i in range(0, pdf_doc.page_count, self.PAGE_CHUNK_SIZE):
-            chunk_doc = fitz.open()
-            end_page = min(i + self.PAGE_CHUNK_SIZE, pdf_doc.page_count) - 1
-            chunk_doc.insert_pdf(pdf_doc, from_page=i, to_page=end_page)
+    async def _split_upload_and_process_pdf(self, pdf_path: str, processing_tasks: List[asyncio.Task]):
+        """
+        Split the PDF at the given local path into chunks, upload them to GCS and process
+        them with Document AI. One task per chunk is appended to processing_tasks, in chunk
+        order; each uploads its chunk and then starts the Document AI job right away, so
+        processing of early chunks overlaps with building and uploading later ones.
+        Chunks are built one after another in a worker thread (PyMuPDF documents must not
+        be shared across threads concurrently) and saved to temporary files, so no chunk
+        is held in memory as a whole. At most MAX_CONCURRENT_CHUNK_UPLOADS chunks are
+        pending upload; building the next chunk waits for a free slot.
+        """
+        pdf_doc = fitz.open(pdf_path, filetype="pdf")
+        upload_semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_CHUNK_UPLOADS)
+
+        async def upload_and_process_chunk(chunk_path: str, chunk_name: str):
+            try:
+                with open(chunk_path, "rb") as chunk_file:
+                    await self.gcs_client.upload_from_file_async(
+                        chunk_file, f"{TEMP_PDF_CHUNKS_PREFIX}{chunk_name}", content_type='application/pdf'
+                    )
+                os.remove(chunk_path)
+            finally:
+                upload_semaphore.release()
             
-            destination_blob_name = f"{TEMP_PDF_CHUNKS_PREFIX}chunk_{i // self.PAGE_CHUNK_SIZE}.pdf"
-            upload_tasks.append(
-                self.gcs_client.upload_from_bytes_async(chunk_doc.tobytes(), destination_blob_name)
+            await self.doc_ai_client.process_document_chunk_async(
+                f"gs://{self.config.bucket_name}/{TEMP_PDF_CHUNKS_PREFIX}{chunk_name}",
+                DOC_AI_CHUNK_RESULTS_PREFIX
             )
-            chunk_doc.close()
-        
-        await asyncio.gather(*upload_tasks)
-        pdf_doc.close()
         
-        chunk_count = len(upload_tasks)
-        logging.info(f"Split PDF into {chunk_count} chunks and uploaded to GCS.")
-        return chunk_count
-
-    async def _process_pdf_chunks(self, chunk_count: int):
-        """Process all PDF chunks with Document AI."""
-        processing_tasks = [
-            self.doc_ai_client.process_document_chunk_async(
-                f"gs://{self.config.bucket_name}/{TEMP_PDF_CHUNKS_PREFIX}chunk_{i}.pdf", 
-                DOC_AI_CHUNK_RESULTS_PREFIX
-            ) for i in range(chunk_count)
-        ]
-        await asyncio.gather(*processing_tasks)
-        logging.info(f"Processed {chunk_count} chunks with Document AI.")
-
-    async def _merge_and_save_results(self, chunk_count: int):
-        """Merge all chunk results and save final layout."""
-        merged_blocks = []
-        merged_text = ""
+        try:
+            with tempfile.TemporaryDirectory() as chunk_dir:
+                for i in range(0, pdf_doc.page_count, self.PAGE_CHUNK_SIZE):
+                    end_page = min(i + self.PAGE_CHUNK_SIZE, pdf_doc.page_count) - 1
+                    chunk_name = f"chunk_{i // self.PAGE_CHUNK_SIZE}.pdf"
+                    chunk_path = os.path.join(chunk_dir, chunk_name)
+                    await upload_semaphore.acquire()
+                    try:
+                        await asyncio.to_thread(self._build_pdf_chunk, pdf_doc, i, end_page, chunk_path)
+                    except BaseException:
+                        upload_semaphore.release()
+                        raise
+                    
+                    processing_tasks.append(asyncio.create_task(upload_and_process_chunk(chunk_path, chunk_name)))
+                
+                # Chunk files must stay in place until all uploads have read them
+                for _ in range(self.MAX_CONCURRENT_CHUNK_UPLOADS):
+                    await upload_semaphore.acquire()
+        finally:
+            pdf_doc.close()
         
-        # Collect results from all chunks
-        for i in range(chunk_count):
-            chunk_json_path = f"{DOC_AI_CHUNK_RESULTS_PREFIX}chunk_{i}.json"
-            chunk_data = await self.gcs_client.read_json_async(chunk_json_path)
-            merged_text += chunk_data.get("text", "")
-            merged_blocks.extend(chunk_data.get("documentLayout", {}).get("blocks", []))
-
-        # Re-index block IDs globally and clean up
-        self.block_counter = 1
-        self._reindex_and_prune_blocks(merged_blocks)
+        logging.info(f"Split PDF into {len(processing_tasks)} chunks and uploaded to GCS.")
+
+    @staticmethod
+    def _build_pdf_chunk(pdf_doc: fitz.Document, from_page: int, to_page: int, chunk_path: str):
+        """
+        Copy the given page range (inclusive) into a new PDF and save it to chunk_path.
+        insert_pdf only copies objects referenced by the selected pages and keeps their
+        streams as they are (already compressed), so the chunk is saved without another
+        garbage collection or deflate pass.
+        """
+        chunk_doc = fitz.open()
+        try:
+            chunk_doc.insert_pdf(pdf_doc, from_page=from_page, to_page=to_page)
+            chunk_doc.save(chunk_path)
+        finally:
+            chunk_doc.close()
+
+    async def _merge_and_save_results(self, processing_tasks: List[asyncio.Task]):
+        """
+        Merge all chunk results and save final layout.
+        Each chunk is merged as soon as it and all preceding chunks are processed, so
+        merging overlaps with Document AI work on later chunks. Chunk results are
+        stream-parsed from GCS and written out block by block, so only one top-level
+        block (plus the chunk's text) is held in memory at a time.
+        The layout has the shape {"documentLayout": {"blocks": [...]}, "text": "..."}.
+        """
+        block_count = 0
+        next_block_id = 1
+
+        with tempfile.SpooledTemporaryFile(max_size=self.MERGE_SPOOL_MAX_BYTES) as merged_file, \
+             tempfile.SpooledTemporaryFile(max_size=self.MERGE_SPOOL_MAX_BYTES) as text_file:
+            merged_file.write(b'{"documentLayout":{"blocks":[')
+
+            for i, processing_task in enumerate(processing_tasks):
+                # Block IDs and text must follow page order, so chunks are merged in order
+                await processing_task
+                block_count, next_block_id = await asyncio.to_thread(
+                    self._stream_chunk_result, f"{DOC_AI_CHUNK_RESULTS_PREFIX}chunk_{i}.json",
+                    merged_file, text_file, block_count, next_block_id
+                )
+
+            merged_file.write(b']},"text":"')
+            text_file.seek(0)
+            shutil.copyfileobj(text_file, merged_file)
+            merged_file.write(b'"}')
+
+            logging.info(f"Processed {len(processing_tasks)} chunks with Document AI.")
+
+            # Save to GCS
+            await self.gcs_client.upload_from_file_async(merged_file, FINAL_MERGED_LAYOUT_PATH)
+
+        logging.info(f"Successfully merged, re-indexed, and saved final layout ({block_count} top-level blocks) to {FINAL_MERGED_LAYOUT_PATH}")
+
+    def _stream_chunk_result(self, blob_name: str, merged_file, text_file,
+                             block_count: int, next_block_id: int) -> Tuple[int, int]:
+        """
+        Stream-parse one chunk result from GCS, appending its re-indexed top-level blocks
+        to merged_file and its text (as escaped JSON string content) to text_file.
+        The same bytes feed two incremental parsers, so the file is downloaded only once
+        regardless of whether 'text' comes before or after the blocks.
         
-        # Create final layout structure
-        final_layout_json = {
-            "text": merged_text, 
-            "documentLayout": {"blocks": merged_blocks}
-        }
+        Returns:
+            The total number of top-level blocks written so far and the next free block ID.
+        """
+        blocks = ijson.sendable_list()
+        texts = ijson.sendable_list()
+        blocks_parser = ijson.items_coro(blocks, "documentLayout.blocks.item", use_float=True)
+        text_parser = ijson.items_coro(texts, "text")
+
+        def write_parsed_blocks():
+            nonlocal block_count, next_block_id
+            # Re-index block IDs globally and clean up before writing
+            next_block_id = self._reindex_and_prune_blocks(blocks, next_block_id)
+            for block in blocks:
+                if block_count:
+                    merged_file.write(b",")
+                merged_file.write(orjson.dumps(block))
+                block_count += 1
+            del blocks[:]
+
+        with self.gcs_client.open_blob_reader(blob_name) as reader:
+            while data := reader.read(self.MERGE_STREAM_READ_SIZE):
+                blocks_parser.send(data)
+                text_parser.send(data)
+                write_parsed_blocks()
+        blocks_parser.close()
+        text_parser.close()
+        write_parsed_blocks()
+
+        for text in texts:
+            text_file.write(orjson.dumps(text)[1:-1])
+        return block_count, next_block_id
+
+    @staticmethod
+    def _reindex_and_prune_blocks(blocks: List[Dict[str, Any]], next_block_id: int) -> int:
+        """
+        Re-index blockId globally and remove pageSpan.
+        IDs are assigned in document order (each block before its nested blocks), which the
+        grouping relies on.
         
-        # Save to GCS
-        await self.gcs_client.upload_from_string_async(
-            json.dumps(final_layout_json, indent=2, ensure_ascii=False),
-            FINAL_MERGED_LAYOUT_PATH
-        )
-        logging.info(f"Successfully merged, re-indexed, and saved final layout to {FINAL_MERGED_LAYOUT_PATH}")
-
-    def _reindex_and_prune_blocks(self, blocks: List[Dict[str, Any]]):
-        """Recursively re-index blockId globally and remove pageSpan."""
-        for block in blocks:
+        Args:
+            blocks: The blocks to re-index in place
+            next_block_id: The ID to assign to the first block
+            
+        Returns:
+            The next free block ID
+        """
+        counter = next_block_id
+        for block in iter_blocks_depth_first(blocks):
             # Remove page span information (not needed after merging)
             block.pop("pageSpan", None)
             
             # Assign new global block ID
-            block["blockId"] = str(self.block_counter)
-            self.block_counter += 1
-            
-            # Process nested text blocks
-            if "blocks" in block.get("textBlock", {}):
-                self._reindex_and_prune_blocks(block["textBlock"]["blocks"])
-            
-            # Process table blocks
-            for row_type in ["headerRows", "bodyRows"]:
-                for row in block.get("tableBlock", {}).get(row_type, []):
-                    for cell in row.get("cells", []):
-                        if "blocks" in cell:
-                            self._reindex_and_prune_blocks(cell["blocks"])
\ No newline at end of file
+            block["blockId"] = str(counter)
+            counter += 1
+        
+        return counter
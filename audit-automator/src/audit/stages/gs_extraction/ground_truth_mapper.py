@@ -1,13 +1,15 @@
 # bsi-audit-automator/src/audit/stages/gs_extraction/ground_truth_mapper.py
 import logging
-import json
+import asyncio
 import os
+import orjson
 from typing import Dict, Any, List
 
 from src.clients.ai_client import AiClient
 from src.clients.rag_client import RagClient
 from src.clients.gcs_client import GcsClient
 from src.constants import GROUND_TRUTH_MAP_PATH, GROUND_TRUTH_MODEL, PROMPT_CONFIG_PATH
+from src.asset_loader import load_asset_json
 
 
 class GroundTruthMapper:
@@ -20,12 +22,7 @@ class GroundTruthMapper:
         self.ai_client = ai_client
         self.rag_client = rag_client
         self.gcs_client = gcs_client
-        self.prompt_config = self._load_asset_json(PROMPT_CONFIG_PATH)
-
-    def _load_asset_json(self, path: str) -> dict:
-        """Load JSON configuration from assets."""
-        with open(path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        self.prompt_config = load_asset_json(PROMPT_CONFIG_PATH)
 
     def _structure_mappings(self, flat_mappings: List[Dict[str, str]]) -> Dict[str, List[str]]:
         """Convert flat mapping list from AI into structured dict of Baustein ID to Zielobjekt Kürzel list."""
@@ -52,7 +49,7 @@ class GroundTruthMapper:
         Returns:
             Dict containing zielobjekte list and baustein_to_zielobjekt_mapping
         """
-        if not force_overwrite and self.gcs_client.blob_exists(GROUND_TRUTH_MAP_PATH):
+        if not force_overwrite and await self.gcs_client.blob_exists_async(GROUND_TRUTH_MAP_PATH):
             logging.info(f"System structure map already exists. Loading from '{GROUND_TRUTH_MAP_PATH}'.")
             try:
                 system_map = await self.gcs_client.read_json_async(GROUND_TRUTH_MAP_PATH)
@@ -60,7 +57,7 @@ class GroundTruthMapper:
                     logging.error("Loaded system structure map has empty 'zielobjekte'. Exiting.")
                     raise ValueError("No Zielobjekte found in loaded map. Cannot proceed.")
                 return system_map
-            except json.JSONDecodeError as e:
+            except orjson.JSONDecodeError as e:
                 logging.error(f"Invalid JSON in system structure map: {e}")
                 raise
         
@@ -68,27 +65,34 @@ class GroundTruthMapper:
         gt_config = self.prompt_config["stages"]["Chapter-3-Ground-Truth"]
         
         try:
-            # Extract Zielobjekte from Strukturanalyse (A.1)
+            # Extract Zielobjekte (A.1) and Mappings (A.3) concurrently; the two calls are independent.
+            # Both are required, so the TaskGroup cancels the other call as soon as one fails
+            # instead of letting it keep retrying for a map that cannot be built.
             z_task_config = gt_config["extract_zielobjekte"]
             z_uris = self.rag_client.get_gcs_uris_for_categories(["Strukturanalyse"])
-            zielobjekte_result = await self.ai_client.generate_json_response(
-                prompt=z_task_config["prompt"], 
-                json_schema=self._load_asset_json(z_task_config["schema_path"]), 
-                gcs_uris=z_uris, 
-                request_context_log="GT: extract_zielobjekte",
-                model_override=GROUND_TRUTH_MODEL
-            )
-
-            # Extract Mappings from Modellierung (A.3)
             m_task_config = gt_config["extract_baustein_mappings"]
             m_uris = self.rag_client.get_gcs_uris_for_categories(["Modellierung"])
-            mappings_result = await self.ai_client.generate_json_response(
-                prompt=m_task_config["prompt"], 
-                json_schema=self._load_asset_json(m_task_config["schema_path"]), 
-                gcs_uris=m_uris, 
-                request_context_log="GT: extract_baustein_mappings",
-                model_override=GROUND_TRUTH_MODEL
-            )
+
+            try:
+                async with asyncio.TaskGroup() as tg:
+                    zielobjekte_task = tg.create_task(self.ai_client.generate_json_response(
+                        prompt=z_task_config["prompt"], 
+                        json_schema=load_asset_json(z_task_config["schema_path"]), 
+                        gcs_uris=z_uris, 
+                        request_context_log="GT: extract_zielobjekte",
+                        model_override=GROUND_TRUTH_MODEL
+                    ))
+                    mappings_task = tg.create_task(self.ai_client.generate_json_response(
+                        prompt=m_task_config["prompt"], 
+                        json_schema=load_asset_json(m_task_config["schema_path"]), 
+                        gcs_uris=m_uris, 
+                        request_context_log="GT: extract_baustein_mappings",
+                        model_override=GROUND_TRUTH_MODEL
+                    ))
+            except ExceptionGroup as eg:
+                # Re-raise the original error rather than the group wrapper
+                raise eg.exceptions[0] from None
+            zielobjekte_result, mappings_result = zielobjekte_task.result(), mappings_task.result()
 
             # Construct the system map
             system_map = {
@@ -98,9 +102,10 @@ class GroundTruthMapper:
             }
             
             # Save to GCS
-            await self.gcs_client.upload_from_string_async(
-                json.dumps(system_map, indent=2, ensure_ascii=False), 
-                GROUND_TRUTH_MAP_PATH
+            await self.gcs_client.upload_from_bytes_async(
+                orjson.dumps(system_map, option=orjson.OPT_INDENT_2),
+                GROUND_TRUTH_MAP_PATH,
+                content_type='application/json'
             )
             logging.info(f"Successfully created and saved system structure map to {GROUND_TRUTH_MAP_PATH}.")
             
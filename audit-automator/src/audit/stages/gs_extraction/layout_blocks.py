@@ -0,0 +1,33 @@
+# bsi-audit-automator/src/audit/stages/gs_extraction/layout_blocks.py
+from typing import Dict, Any, Iterable, Iterator
+
+
+def iter_blocks_depth_first(blocks: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """
+    Yields Document AI layout blocks and all their nested blocks (textBlock.blocks and
+    table cell blocks) in document order, each block before its nested blocks.
+    Uses an explicit stack of iterators instead of recursion. Nested blocks are looked up
+    only after the consumer has handled the parent, so the parent may be modified in place.
+    """
+    stack = [iter(blocks)]
+    
+    while stack:
+        block = next(stack[-1], None)
+        if block is None:
+            stack.pop()
+            continue
+        
+        yield block
+        
+        # Collect nested text blocks and table cell blocks in document order
+        nested_lists = []
+        if "blocks" in block.get("textBlock", {}):
+            nested_lists.append(block["textBlock"]["blocks"])
+        for row_type in ["headerRows", "bodyRows"]:
+            for row in block.get("tableBlock", {}).get(row_type, []):
+                for cell in row.get("cells", []):
+                    if "blocks" in cell:
+                        nested_lists.append(cell["blocks"])
+        
+        # Push in reverse so the first nested list is visited next
+        stack.extend(iter(nested) for nested in reversed(nested_lists))
@@ -1,6 +1,6 @@
 # file: src/audit/stages/stage_3_dokumentenpruefung.py
 import logging
-import json
+import orjson
 import asyncio
 from typing import Dict, Any, List, Tuple
 from datetime import datetime, timedelta
@@ -13,6 +13,7 @@ from src.clients.ai_client import AiClient
 from src.clients.rag_client import RagClient
 from src.audit.stages.control_catalog import ControlCatalog
 from src.constants import EXTRACTED_CHECK_DATA_PATH, GROUND_TRUTH_MAP_PATH, PROMPT_CONFIG_PATH
+from src.asset_loader import load_asset_json
 
 class Chapter3Runner:
     """
@@ -45,15 +46,12 @@ class Chapter3Runner:
         self.ai_client = ai_client
         self.rag_client = rag_client
         self.control_catalog = ControlCatalog()
-        self.prompt_config = self._load_asset_json(PROMPT_CONFIG_PATH)
+        self.prompt_config = load_asset_json(PROMPT_CONFIG_PATH)
         self.execution_plan = self._build_execution_plan_from_template()
         self._doc_map = self.rag_client._document_category_map
         self._ground_truth_map = None # Lazy loaded
         logging.info(f"Initialized runner for stage: {self.STAGE_NAME} with dynamic execution plan.")
 
-    def _load_asset_json(self, path: str) -> dict:
-        with open(path, 'r', encoding='utf-8') as f: return json.load(f)
-
     async def _get_ground_truth_map(self) -> Dict[str, Any]:
         """Lazy loads the ground truth map and caches it."""
         if self._ground_truth_map is None:
@@ -81,25 +79,25 @@ class Chapter3Runner:
         findings = []
         ground_truth_map = await self._get_ground_truth_map()
 
-        # Task E: Coverage Check
-        all_mapped_kuerzel = {k for k_list in ground_truth_map.get("baustein_to_zielobjekt_mapping", {}).values() for k in k_list}
-        all_checked_kuerzel = {a.get("zielobjekt_kuerzel") for a in anforderungen}
-        missing_in_check = all_mapped_kuerzel - all_checked_kuerzel
-        if missing_in_check:
-            desc = f"Die Zielobjekte {sorted(list(missing_in_check))} sind in der Modellierung vorhanden, aber es wurden für sie keine Anforderungen im Grundschutz-Check gefunden oder verarbeitet."
-            findings.append({"category": "AG", "description": desc})
-            logging.warning(f"Coverage Check (Task E) failed: {desc}")
-
-        # Q1: Status erhoben? (Deterministic)
-        answers[0] = all(a.get("umsetzungsstatus") for a in anforderungen)
-        if not answers[0]:
-            findings.append({"category": "AG", "description": "Nicht für alle Anforderungen wurde ein Umsetzungsstatus erhoben."})
-
-        # Q5: Prüfung < 12 Monate? (Deterministic)
+        # Partition the requirements for all checks in a single pass
+        level_1_ids = set(self.control_catalog.get_level_1_control_ids())
         one_year_ago = datetime.now() - timedelta(days=365)
-        
+        all_checked_kuerzel = set()
+        all_status_collected = True
         outdated = []
+        entbehrlich_items, muss_anforderungen, unmet_items = [], [], []
         for a in anforderungen:
+            all_checked_kuerzel.add(a.get("zielobjekt_kuerzel"))
+            status = a.get("umsetzungsstatus")
+            if not status:
+                all_status_collected = False
+            elif status == "entbehrlich":
+                entbehrlich_items.append(a)
+            elif status in ("Nein", "teilweise"):
+                unmet_items.append(a)
+            if a.get("id") in level_1_ids:
+                muss_anforderungen.append(a)
+
             date_str = a.get("datumLetztePruefung", "1970-01-01")
             try:
                 # Try ISO format first
@@ -116,7 +114,20 @@ class Chapter3Runner:
             if check_date < one_year_ago:
                 outdated.append(a)
 
+        # Task E: Coverage Check
+        all_mapped_kuerzel = {k for k_list in ground_truth_map.get("baustein_to_zielobjekt_mapping", {}).values() for k in k_list}
+        missing_in_check = all_mapped_kuerzel - all_checked_kuerzel
+        if missing_in_check:
+            desc = f"Die Zielobjekte {sorted(list(missing_in_check))} sind in der Modellierung vorhanden, aber es wurden für sie keine Anforderungen im Grundschutz-Check gefunden oder verarbeitet."
+            findings.append({"category": "AG", "description": desc})
+            logging.warning(f"Coverage Check (Task E) failed: {desc}")
+
+        # Q1: Status erhoben? (Deterministic)
+        answers[0] = all_status_collected
+        if not answers[0]:
+            findings.append({"category": "AG", "description": "Nicht für alle Anforderungen wurde ein Umsetzungsstatus erhoben."})
 
+        # Q5: Prüfung < 12 Monate? (Deterministic)
         answers[4] = not bool(outdated)
         if outdated:
             findings.append({"category": "AG", "description": f"Die Prüfung von {len(outdated)} Anforderungen liegt mehr als 12 Monate zurück."})
@@ -125,9 +136,13 @@ class Chapter3Runner:
         ch3_config = self.prompt_config["stages"]["Chapter-3"]
         targeted_prompt_template = ch3_config["targeted_question"]["prompt"]
         questions_config = ch3_config["questions"]
+        question_schema = load_asset_json("assets/schemas/generic_1_question_schema.json")
+
+        # Q2-Q4 are independent targeted AI questions: collect them by answer index and ask
+        # them concurrently (bounded by the AiClient semaphore) instead of one after another.
+        targeted_questions = {}
 
         # Q2: "entbehrlich" plausibel? (Targeted AI - Task D)
-        entbehrlich_items = [a for a in anforderungen if a.get("umsetzungsstatus") == "entbehrlich"]
         risikoanalyse_uris = self.rag_client.get_gcs_uris_for_categories(["Risikoanalyse"])
         if entbehrlich_items:
             for item in entbehrlich_items: # Enrich with control level
@@ -136,46 +151,46 @@ class Chapter3Runner:
             question = questions_config["entbehrlich"]
             prompt = targeted_prompt_template.format(
                 question=question,
-                json_data=json.dumps(entbehrlich_items, indent=2, ensure_ascii=False),
+                json_data=orjson.dumps(entbehrlich_items, option=orjson.OPT_INDENT_2).decode(),
             )
-            res = await self.ai_client.generate_json_response(
-                prompt, self._load_asset_json("assets/schemas/generic_1_question_schema.json"), 
-                gcs_uris=risikoanalyse_uris, request_context_log="3.6.1-Q2"
-            )
-            answers[1], findings = (res['answers'][0], findings + [res['finding']] if res['finding']['category'] != 'OK' else findings)
+            targeted_questions[1] = (prompt, risikoanalyse_uris, "3.6.1-Q2")
         else:
             answers[1] = True
 
         # Q3: MUSS-Anforderungen erfüllt? (Targeted AI)
-        level_1_ids = self.control_catalog.get_level_1_control_ids()
-        muss_anforderungen = [a for a in anforderungen if a.get("id") in level_1_ids]
         if muss_anforderungen:
             prompt = targeted_prompt_template.format(
                 question=questions_config["muss_anforderungen"],
-                json_data=json.dumps(muss_anforderungen, indent=2, ensure_ascii=False)
+                json_data=orjson.dumps(muss_anforderungen, option=orjson.OPT_INDENT_2).decode()
             )
-            res = await self.ai_client.generate_json_response(prompt, self._load_asset_json("assets/schemas/generic_1_question_schema.json"), request_context_log="3.6.1-Q3")
-            answers[2], findings = (res['answers'][0], findings + [res['finding']] if res['finding']['category'] != 'OK' else findings)
+            targeted_questions[2] = (prompt, None, "3.6.1-Q3")
         else:
             answers[2] = True
 
         # Q4: Nicht/teilweise umgesetzte in A.6? (Targeted AI)
-        unmet_items = [a for a in anforderungen if a.get("umsetzungsstatus") in ["Nein", "teilweise"]]
         realisierungsplan_uris = self.rag_client.get_gcs_uris_for_categories(["Realisierungsplan"])
         if unmet_items and realisierungsplan_uris:
             prompt = targeted_prompt_template.format(
                 question=questions_config["nicht_umgesetzt"],
-                json_data=json.dumps(unmet_items, indent=2, ensure_ascii=False)
-            )
-            res = await self.ai_client.generate_json_response(
-                prompt, self._load_asset_json("assets/schemas/generic_1_question_schema.json"), 
-                gcs_uris=realisierungsplan_uris, request_context_log="3.6.1-Q4"
+                json_data=orjson.dumps(unmet_items, option=orjson.OPT_INDENT_2).decode()
             )
-            answers[3], findings = (res['answers'][0], findings + [res['finding']] if res['finding']['category'] != 'OK' else findings)
+            targeted_questions[3] = (prompt, realisierungsplan_uris, "3.6.1-Q4")
         else:
             answers[3] = not unmet_items
-            if unmet_items and not realisierungsplan_uris:
-                findings.append({"category": "AG", "description": "Es gibt nicht umgesetzte Anforderungen, aber der Realisierungsplan (A.6) wurde nicht gefunden, um die Dokumentation zu überprüfen."})
+
+        if targeted_questions:
+            targeted_results = await asyncio.gather(*(
+                self.ai_client.generate_json_response(prompt, question_schema, gcs_uris=uris, request_context_log=context_log)
+                for prompt, uris, context_log in targeted_questions.values()
+            ))
+            # Results come back in question order, so findings keep the Q2, Q3, Q4 order
+            for answer_idx, res in zip(targeted_questions, targeted_results):
+                answers[answer_idx] = res['answers'][0]
+                if res['finding']['category'] != 'OK':
+                    findings.append(res['finding'])
+
+        if unmet_items and not realisierungsplan_uris:
+            findings.append({"category": "AG", "description": "Es gibt nicht umgesetzte Anforderungen, aber der Realisierungsplan (A.6) wurde nicht gefunden, um die Dokumentation zu überprüfen."})
 
         # Consolidate findings
         final_finding = {"category": "OK", "description": "Alle Prüfungen für den IT-Grundschutz-Check waren erfolgreich."}
@@ -204,7 +219,7 @@ class Chapter3Runner:
     def _build_execution_plan_from_template(self) -> List[Dict[str, Any]]:
         """Parses master_report_template.json to build a dynamic list of tasks."""
         plan = []
-        template = self._load_asset_json(self.TEMPLATE_PATH)
+        template = load_asset_json(self.TEMPLATE_PATH)
         ch3_template = template.get("bsiAuditReport", {}).get("dokumentenpruefung", {})
         
         for subchapter_name, subchapter_data in ch3_template.items():
@@ -249,7 +264,7 @@ class Chapter3Runner:
         if key == 'modellierungsdetails':
             ground_truth_map = await self._get_ground_truth_map()
             zielobjekte_list = ground_truth_map.get('zielobjekte', [])
-            prompt_format_args['zielobjekte_json'] = json.dumps(zielobjekte_list, indent=2, ensure_ascii=False)
+            prompt_format_args['zielobjekte_json'] = orjson.dumps(zielobjekte_list, option=orjson.OPT_INDENT_2).decode()
         
         prompt = task["prompt"].format(**prompt_format_args)
         uris = self.rag_client.get_gcs_uris_for_categories(task.get("source_categories"))
@@ -257,7 +272,7 @@ class Chapter3Runner:
         if not uris and task.get("source_categories") is not None:
              return {key: {"error": f"No source documents for categories: {task.get('source_categories')}"}}
         try:
-            data = await self.ai_client.generate_json_response(prompt, self._load_asset_json(schema_path), uris, f"Chapter-3: {key}")
+            data = await self.ai_client.generate_json_response(prompt, load_asset_json(schema_path), uris, f"Chapter-3: {key}")
             if key == "aktualitaetDerReferenzdokumente":
                 coverage_finding = self._check_document_coverage()
                 if coverage_finding['category'] != 'OK': data['finding'] = coverage_finding
@@ -271,7 +286,7 @@ class Chapter3Runner:
         key = task["key"]
         prompt = task["prompt"].format(summary_topic=task["summary_topic"], previous_findings=previous_findings)
         try:
-            return {key: await self.ai_client.generate_json_response(prompt, self._load_asset_json(task["schema_path"]), request_context_log=f"Chapter-3 Summary: {key}")}
+            return {key: await self.ai_client.generate_json_response(prompt, load_asset_json(task["schema_path"]), request_context_log=f"Chapter-3 Summary: {key}")}
         except Exception as e:
             return {key: {"error": str(e)}}
 
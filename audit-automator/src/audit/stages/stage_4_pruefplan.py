@@ -1,6 +1,6 @@
 # src/audit/stages/stage_4_pruefplan.py
 import logging
-import json
+import orjson
 import asyncio
 from typing import Dict, Any
 from google.cloud.exceptions import NotFound
@@ -10,6 +10,7 @@ from src.clients.gcs_client import GcsClient
 from src.clients.ai_client import AiClient
 from src.clients.rag_client import RagClient
 from src.constants import GROUND_TRUTH_MAP_PATH, PROMPT_CONFIG_PATH
+from src.asset_loader import load_asset_json
 
 class Chapter4Runner:
     """
@@ -24,15 +25,11 @@ class Chapter4Runner:
         self.gcs_client = gcs_client
         self.ai_client = ai_client
         self.rag_client = rag_client
-        self.prompt_config = self._load_asset_json(PROMPT_CONFIG_PATH)
+        self.prompt_config = load_asset_json(PROMPT_CONFIG_PATH)
         self.subchapter_definitions = self._load_subchapter_definitions()
         self.ground_truth_map = None
         logging.info(f"Initialized runner for stage: {self.STAGE_NAME}")
 
-    def _load_asset_json(self, path: str) -> dict:
-        with open(path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-
     def _load_ground_truth_map(self) -> None:
         """Loads the ground truth system structure map from GCS."""
         try:
@@ -77,15 +74,18 @@ class Chapter4Runner:
         }
         definitions["auswahlMassnahmenAusRisikoanalyse"] = ch4_config["auswahlMassnahmenAusRisikoanalyse"]
 
-        # Mark the type for processing
+        # Mark the type for processing (on a copy; the prompt config is shared and read-only)
         for key in definitions:
             if "prompt" in definitions[key]:
-                definitions[key]["type"] = "ai_driven"
+                definitions[key] = {**definitions[key], "type": "ai_driven"}
 
         return definitions
 
-    async def _process_single_subchapter(self, name: str, definition: dict) -> Dict[str, Any]:
-        """Generates planning content for a single subchapter, supporting AI and deterministic modes."""
+    async def _process_single_subchapter(self, name: str, definition: dict, ground_truth_json_str: str) -> Dict[str, Any]:
+        """
+        Generates planning content for a single subchapter, supporting AI and deterministic modes.
+        ground_truth_json_str is the serialized ground truth map, shared by all subchapters.
+        """
         logging.info(f"Starting planning for subchapter: {definition.get('key', name)} ({name})")
         
         if definition.get("type") == "deterministic":
@@ -95,10 +95,9 @@ class Chapter4Runner:
         # AI-driven
         prompt_template = definition["prompt"]
         # FIXED: Use safe string replacement to avoid JSON key conflicts with format()
-        ground_truth_json_str = json.dumps(self.ground_truth_map, indent=2, ensure_ascii=False)
         prompt = prompt_template.replace("{ground_truth_map_json}", ground_truth_json_str)
         
-        schema = self._load_asset_json(definition["schema_path"])
+        schema = load_asset_json(definition["schema_path"])
         
         # Check if this task needs document context
         gcs_uris = []
@@ -134,12 +133,15 @@ class Chapter4Runner:
             logging.warning(f"No subchapter definitions found. Skipping Chapter 4.")
             return {}
 
-        tasks = [self._process_single_subchapter(name, definition) for name, definition in self.subchapter_definitions.items()]
+        # Serialize the map once for all subchapter prompts
+        ground_truth_json_str = orjson.dumps(self.ground_truth_map, option=orjson.OPT_INDENT_2).decode()
+        tasks = [
+            self._process_single_subchapter(name, definition, ground_truth_json_str)
+            for name, definition in self.subchapter_definitions.items()
+        ]
         results_list = await asyncio.gather(*tasks)
 
-        aggregated_results = {}
-        for res_dict in results_list:
-            aggregated_results.update(res_dict)
-            
+        aggregated_results = {key: value for res_dict in results_list for key, value in res_dict.items()}
+
         logging.info(f"Successfully aggregated planning results for stage {self.STAGE_NAME}")
         return aggregated_results
\ No newline at end of file
@@ -1,6 +1,5 @@
 # file: src/audit/stages/stage_5_vor_ort_audit.py
 import logging
-import json
 from typing import Dict, Any, List, Tuple
 from google.cloud.exceptions import NotFound
 
@@ -17,6 +16,8 @@ class Chapter5Runner:
     enriching it with data extracted in prior stages.
     """
     STAGE_NAME = "Chapter-5"
+    # Display names for the implementation status values extracted from the Grundschutz-Check
+    STATUS_DISPLAY_NAMES = {"Ja": "Umgesetzt", "Nein": "Nicht umgesetzt", "teilweise": "Teilweise umgesetzt", "entbehrlich": "Entbehrlich"}
 
     def __init__(self, config: AppConfig, gcs_client: GcsClient, ai_client: AiClient):
         self.config = config
@@ -115,9 +116,7 @@ class Chapter5Runner:
                 
                 customer_explanation = extracted_details.get("umsetzungserlaeuterung", "Keine spezifische Angabe für dieses Zielobjekt im Grundschutz-Check gefunden.")
                 bewertung_status_raw = extracted_details.get("umsetzungsstatus", "N/A")
-
-                status_map = {"Ja": "Umgesetzt", "Nein": "Nicht umgesetzt", "teilweise": "Teilweise umgesetzt", "entbehrlich": "Entbehrlich"}
-                final_bewertung_status = status_map.get(bewertung_status_raw, bewertung_status_raw)
+                final_bewertung_status = self.STATUS_DISPLAY_NAMES.get(bewertung_status_raw, bewertung_status_raw)
 
                 anforderungen_list.append({
                     "nummer": control_id,
@@ -1,6 +1,6 @@
 # bsi-audit-automator/src/audit/stages/stage_gs_check_extraction.py
 import logging
-import json
+import asyncio
 from typing import Dict, Any
 
 from src.config import AppConfig
@@ -8,7 +8,7 @@ from src.clients.gcs_client import GcsClient
 from src.clients.document_ai_client import DocumentAiClient
 from src.clients.ai_client import AiClient
 from src.clients.rag_client import RagClient
-from src.constants import EXTRACTED_CHECK_DATA_PATH, GROUND_TRUTH_MAP_PATH
+from src.constants import EXTRACTED_CHECK_DATA_PATH, GROUND_TRUTH_MAP_PATH, FINAL_MERGED_LAYOUT_PATH, GROUPED_BLOCKS_PATH
 
 from .gs_extraction.ground_truth_mapper import GroundTruthMapper
 from .gs_extraction.document_processor import DocumentProcessor
@@ -32,26 +32,40 @@ class GrundschutzCheckExtractionRunner:
         self.ground_truth_mapper = GroundTruthMapper(ai_client, rag_client, gcs_client)
         self.document_processor = DocumentProcessor(gcs_client, doc_ai_client, rag_client, config)
         self.block_grouper = BlockGrouper(gcs_client)
-        self.ai_refiner = AiRefiner(ai_client, gcs_client)
+        self.ai_refiner = AiRefiner(ai_client, gcs_client, config)
         
         logging.info(f"Initialized runner for stage: {self.STAGE_NAME}")
 
+    async def _check_existing_artifacts(self, force_overwrite: bool) -> Dict[str, bool]:
+        """
+        Checks concurrently which step outputs already exist. The flags are passed to the
+        steps, so they can skip without a GCS round-trip of their own.
+        """
+        paths = [FINAL_MERGED_LAYOUT_PATH, GROUPED_BLOCKS_PATH, EXTRACTED_CHECK_DATA_PATH]
+        if force_overwrite:
+            return {path: False for path in paths}
+        exists = await asyncio.gather(*(self.gcs_client.blob_exists_async(path) for path in paths))
+        return dict(zip(paths, exists))
+
     async def run(self, force_overwrite: bool = False) -> Dict[str, Any]:
         """Main execution method for the full extraction and refinement pipeline."""
         logging.info(f"Executing stage: {self.STAGE_NAME}")
         
         try:
-            # Step 1: Establish Ground Truth system structure
-            system_map = await self.ground_truth_mapper.create_system_structure_map(force_overwrite)
+            # Step 1: Establish Ground Truth system structure (while checking for existing step outputs)
+            system_map, artifacts_exist = await asyncio.gather(
+                self.ground_truth_mapper.create_system_structure_map(force_overwrite),
+                self._check_existing_artifacts(force_overwrite)
+            )
             
             # Step 2: Process document with Document AI Layout Parser
-            await self.document_processor.execute_layout_parser_workflow(force_overwrite)
+            await self.document_processor.execute_layout_parser_workflow(artifacts_exist[FINAL_MERGED_LAYOUT_PATH])
 
             # Step 3: Group layout blocks by Zielobjekt context
-            await self.block_grouper.group_layout_blocks_by_zielobjekt(system_map, force_overwrite)
+            await self.block_grouper.group_layout_blocks_by_zielobjekt(system_map, artifacts_exist[GROUPED_BLOCKS_PATH])
             
             # Step 4: Refine grouped blocks with AI to extract structured requirements
-            await self.ai_refiner.refine_grouped_blocks_with_ai(system_map, force_overwrite)
+            await self.ai_refiner.refine_grouped_blocks_with_ai(system_map, artifacts_exist[EXTRACTED_CHECK_DATA_PATH])
 
             return {"status": "success", "message": f"Stage {self.STAGE_NAME} completed successfully."}
             
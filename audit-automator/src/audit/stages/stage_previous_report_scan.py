@@ -1,6 +1,5 @@
 # src/audit/stages/stage_previous_report_scan.py
 import logging
-import json
 import asyncio
 from typing import Dict, Any
 
@@ -8,6 +7,7 @@ from src.config import AppConfig
 from src.clients.ai_client import AiClient
 from src.clients.rag_client import RagClient
 from src.constants import PROMPT_CONFIG_PATH
+from src.asset_loader import load_asset_json
 
 class PreviousReportScanner:
     """
@@ -20,13 +20,9 @@ class PreviousReportScanner:
         self.config = config
         self.ai_client = ai_client
         self.rag_client = rag_client
-        self.prompt_config = self._load_asset_json(PROMPT_CONFIG_PATH)
+        self.prompt_config = load_asset_json(PROMPT_CONFIG_PATH)
         logging.info(f"Initialized runner for stage: {self.STAGE_NAME}")
 
-    def _load_asset_json(self, path: str) -> dict:
-        with open(path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-
     async def _run_extraction_task(self, task_name: str, gcs_uri: str) -> Dict[str, Any]:
         """
         Runs a single AI extraction task for a part of the report.
@@ -42,7 +38,7 @@ class PreviousReportScanner:
         try:
             task_config = self.prompt_config["stages"][self.STAGE_NAME][task_name]
             prompt = task_config["prompt"]
-            schema = self._load_asset_json(task_config["schema_path"])
+            schema = load_asset_json(task_config["schema_path"])
             
             response = await self.ai_client.generate_json_response(
                 prompt=prompt,
@@ -78,9 +74,7 @@ class PreviousReportScanner:
         results_list = await asyncio.gather(*coroutines)
 
         # 3. Aggregate results into a single dictionary
-        final_result = {}
-        for result in results_list:
-            final_result.update(result)
-            
+        final_result = {key: value for result in results_list for key, value in result.items()}
+
         logging.info(f"Successfully completed all extractions for stage {self.STAGE_NAME}")
         return final_result
\ No newline at end of file
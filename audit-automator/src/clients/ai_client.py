@@ -1,10 +1,10 @@
 # src/clients/ai_client.py
 import logging
-import json
 import asyncio
-import time
+import orjson
+import random
 import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
 from google.cloud import aiplatform
 from google.api_core import exceptions as api_core_exceptions
@@ -12,10 +12,25 @@ from jsonschema import validate, ValidationError
 from vertexai.generative_models import GenerativeModel, GenerationConfig, Part
 
 from src.config import AppConfig
-from src.constants import GROUND_TRUTH_MODEL
+from src.constants import GROUND_TRUTH_MODEL, PROMPT_CONFIG_PATH
+from src.asset_loader import load_asset_json
 
 MAX_RETRIES = 5
-PROMPT_CONFIG_PATH = "assets/json/prompt_config.json"
+MAX_BACKOFF_SECONDS = 60
+# Rate limiting (429) means the backend cannot keep up, so it is backed off on a longer schedule
+THROTTLE_BASE_SECONDS = 5
+THROTTLE_MAX_BACKOFF_SECONDS = 120
+# Permanent API errors that no retry can fix; all other API errors (including ABORTED and
+# errors without a status code) are treated as transient and retried
+NON_RETRYABLE_API_ERRORS = (
+    api_core_exceptions.InvalidArgument,
+    api_core_exceptions.PermissionDenied,
+    api_core_exceptions.Unauthenticated,
+    api_core_exceptions.NotFound,
+    api_core_exceptions.FailedPrecondition,
+)
+# Start of the ValueError message raised when a model response is not valid JSON
+JSON_PARSE_ERROR_PREFIX = "Failed to parse model response as JSON"
 
 
 class AiClient:
@@ -24,10 +39,7 @@ class AiClient:
     def __init__(self, config: AppConfig):
         self.config = config
         
-        with open(PROMPT_CONFIG_PATH, 'r', encoding='utf-8') as f:
-            prompt_config = json.load(f)
-        
-        base_system_message = prompt_config.get("system_message", "")
+        base_system_message = load_asset_json(PROMPT_CONFIG_PATH).get("system_message", "")
         if not base_system_message:
             logging.warning("System message is empty. AI calls will not have a predefined persona.")
 
@@ -46,6 +58,12 @@ class AiClient:
         # Cache for alternative model instances
         self._model_cache = {GROUND_TRUTH_MODEL: self.generative_model}
         
+        # PDF context parts by GCS URI; the same source documents are attached to many prompts
+        self._pdf_part_cache: Dict[str, Part] = {}
+
+        # GenerationConfig per schema object, keyed by id(schema)
+        self._generation_config_cache: Dict[int, Tuple[Dict[str, Any], GenerationConfig]] = {}
+        
         self.semaphore = asyncio.Semaphore(config.max_concurrent_ai_requests)
 
         logging.info(f"Vertex AI Client instantiated for project '{config.gcp_project_id}' in region '{config.region}'.")
@@ -68,22 +86,27 @@ class AiClient:
             )
         return self._model_cache[model_name]
 
-    async def generate_json_response_single_attempt(
-        self, 
-        prompt: str, 
-        json_schema: Dict[str, Any], 
-        gcs_uris: List[str] = None, 
-        request_context_log: str = "Generic AI Request",
-        model_override: Optional[str] = None
-    ) -> Dict[str, Any]:
+    def _get_pdf_part(self, gcs_uri: str) -> Part:
+        """Returns the PDF Part for a GCS URI, creating it only on first use."""
+        part = self._pdf_part_cache.get(gcs_uri)
+        if part is None:
+            part = Part.from_uri(gcs_uri, mime_type="application/pdf")
+            self._pdf_part_cache[gcs_uri] = part
+        return part
+
+    def _get_generation_config(self, json_schema: Dict[str, Any]) -> GenerationConfig:
         """
-        Single attempt JSON generation - used for model fallback scenarios.
-        Fails fast on JSON errors rather than retrying 5 times.
+        Returns the JSON-mode GenerationConfig for the given schema, building it only once
+        per schema object (schemas come from the shared asset cache and are reused on every
+        call). The schema is kept referenced next to its config, so its id stays unique.
         """
-        # Same logic as generate_json_response but without the retry loop
-        # Just one attempt and fail immediately on JSON parsing errors
+        cached = self._generation_config_cache.get(id(json_schema))
+        if cached is not None and cached[0] is json_schema:
+            return cached[1]
+
+        # The SDK rewrites the schema in place while converting it, so it works on a copy
         try:
-            schema_for_api = json.loads(json.dumps(json_schema))
+            schema_for_api = orjson.loads(orjson.dumps(json_schema))
             schema_for_api.pop("$schema", None)
         except Exception as e:
             logging.error(f"Failed to process JSON schema before API call: {e}")
@@ -95,36 +118,8 @@ class AiClient:
             max_output_tokens=65535,
             temperature=0.2,
         )
-
-        model_to_use = model_override if model_override else GROUND_TRUTH_MODEL
-        generative_model = self._get_model_instance(model_to_use)
-
-        contents = [prompt]
-        if gcs_uris:
-            for uri in gcs_uris:
-                contents.append(Part.from_uri(uri, mime_type="application/pdf"))
-
-        logging.info(f"[{request_context_log}] Single attempt with model '{model_to_use}'...")
-        response = await generative_model.generate_content_async(
-            contents=contents,
-            generation_config=gen_config,
-        )
-
-        if not response.candidates:
-            raise ValueError("The model response contained no candidates.")
-
-        finish_reason = response.candidates[0].finish_reason.name
-        if finish_reason not in ["STOP", "MAX_TOKENS"]:
-            raise ValueError(f"Model finished with non-OK reason: '{finish_reason}'")
-
-        try:
-            response_json = json.loads(response.text)
-        except json.JSONDecodeError as e:
-            # Clean JSON error without the full traceback
-            raise ValueError(f"Failed to parse model response as JSON: {str(e).split(':')[0]}")
-        
-        logging.info(f"[{request_context_log}] Successfully generated JSON response.")
-        return response_json
+        self._generation_config_cache[id(json_schema)] = (json_schema, gen_config)
+        return gen_config
 
     async def generate_json_response(
         self, 
@@ -152,21 +147,7 @@ class AiClient:
             The parsed JSON response from the model.
         """
         retries = max_retries if max_retries is not None else MAX_RETRIES
-        try:
-            schema_for_api = json.loads(json.dumps(json_schema))
-            schema_for_api.pop("$schema", None)
-        except Exception as e:
-            logging.error(f"Failed to process JSON schema before API call: {e}")
-            raise ValueError("Invalid JSON schema provided.") from e
-
-        gen_config = GenerationConfig(
-            response_mime_type="application/json",
-            response_schema=schema_for_api,
-            max_output_tokens=65535,
-
-            
-            temperature=0.2,
-        )
+        gen_config = self._get_generation_config(json_schema)
 
         # Select the appropriate model
         model_to_use = model_override if model_override else GROUND_TRUTH_MODEL
@@ -175,12 +156,13 @@ class AiClient:
         # Build the content list. The system message is now handled by the model constructor.
         contents = [prompt]
         if gcs_uris:
-            for uri in gcs_uris:
-                contents.append(Part.from_uri(uri, mime_type="application/pdf"))
+            contents.extend(self._get_pdf_part(uri) for uri in gcs_uris)
             if self.config.is_test_mode:
                 logging.info(f"Attaching {len(gcs_uris)} GCS files to the prompt.")
 
         async with self.semaphore:
+            # Counts only rate-limit failures, so other errors in between do not reset the throttle backoff
+            throttle_attempt = 0
             for attempt in range(retries):
                 try:
                     logging.info(f"[{request_context_log}] Attempt {attempt + 1}/{retries}: Calling Gemini model '{model_to_use}'...")
@@ -197,34 +179,57 @@ class AiClient:
                         raise ValueError(f"Model finished with non-OK reason: '{finish_reason}'")
 
                     try:
-                        response_json = json.loads(response.text)
-                    except json.JSONDecodeError as e:
+                        response_json = orjson.loads(response.text)
+                    except orjson.JSONDecodeError as e:
                         # Clean JSON error without the full traceback
-                        raise ValueError(f"Failed to parse model response as JSON: {str(e).split(':')[0]}")
+                        raise ValueError(f"{JSON_PARSE_ERROR_PREFIX}: {str(e).split(':')[0]}")
                     
                     logging.info(f"[{request_context_log}] Successfully generated and parsed JSON response on attempt {attempt + 1}.")
                     return response_json
 
                 except (api_core_exceptions.GoogleAPICallError, Exception) as e:
-                    wait_time = 2 ** attempt
+                    is_api_error = isinstance(e, api_core_exceptions.GoogleAPICallError)
+                    if isinstance(e, NON_RETRYABLE_API_ERRORS):
+                        logging.critical(f"[{request_context_log}] AI generation failed with non-retryable Google API Error (Code: {e.code}): {e.message}", exc_info=True)
+                        raise
                     if attempt == retries - 1:
                         logging.critical(f"[{request_context_log}] AI generation failed after all {retries} retries.", exc_info=True)
                         raise
 
-                    if isinstance(e, api_core_exceptions.GoogleAPICallError):
-                        logging.warning(f"[{request_context_log}] Generation attempt {attempt + 1} failed with Google API Error (Code: {e.code}): {e.message}. Retrying in {wait_time}s...")
+                    # Full jitter spreads out retries of concurrent requests; a server-provided delay takes precedence
+                    wait_time = self._get_server_retry_delay(e) if is_api_error else None
+                    if wait_time is None:
+                        if isinstance(e, api_core_exceptions.ResourceExhausted):
+                            # Equal jitter: always wait at least half the throttle interval
+                            throttle_interval = min(THROTTLE_MAX_BACKOFF_SECONDS, THROTTLE_BASE_SECONDS * 2 ** throttle_attempt)
+                            wait_time = throttle_interval / 2 + random.uniform(0, throttle_interval / 2)
+                            throttle_attempt += 1
+                        else:
+                            wait_time = random.uniform(0, min(MAX_BACKOFF_SECONDS, 2 ** attempt))
+
+                    if is_api_error:
+                        logging.warning(f"[{request_context_log}] Generation attempt {attempt + 1} failed with Google API Error (Code: {e.code}): {e.message}. Retrying in {wait_time:.1f}s...")
                     else:
                         # Clean up JSON error messages to be more readable
                         error_msg = str(e)
-                        if "Unterminated string" in error_msg or "json.decoder.JSONDecodeError" in error_msg:
-                            logging.warning(f"[{request_context_log}] Attempt {attempt + 1} failed: JSON parsing error. Retrying in {wait_time}s...")
+                        if error_msg.startswith(JSON_PARSE_ERROR_PREFIX):
+                            logging.warning(f"[{request_context_log}] Attempt {attempt + 1} failed: JSON parsing error. Retrying in {wait_time:.1f}s...")
                         else:
-                            logging.warning(f"[{request_context_log}] Attempt {attempt + 1} failed: {error_msg}. Retrying in {wait_time}s...")
+                            logging.warning(f"[{request_context_log}] Attempt {attempt + 1} failed: {error_msg}. Retrying in {wait_time:.1f}s...")
 
                     await asyncio.sleep(wait_time)
 
         raise RuntimeError("AI generation failed unexpectedly after exhausting all retries.")
 
+    @staticmethod
+    def _get_server_retry_delay(error: api_core_exceptions.GoogleAPICallError) -> Optional[float]:
+        """Returns the retry delay in seconds requested by the server (google.rpc.RetryInfo), if any."""
+        for detail in getattr(error, "details", None) or []:
+            retry_delay = getattr(detail, "retry_delay", None)
+            if retry_delay is not None:
+                return retry_delay.seconds + retry_delay.nanos / 1e9
+        return None
+
     async def generate_validated_json_response(
         self, 
         prompt: str, 
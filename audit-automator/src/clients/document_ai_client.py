@@ -1,8 +1,11 @@
 # src/clients/document_ai_client.py
 import logging
 import asyncio
-import json
-from typing import Dict, Any, Optional
+import shutil
+import tempfile
+import ijson
+import orjson
+from typing import Dict, Any, List, Optional
 from google.cloud import documentai_v1 as documentai
 from google.cloud.documentai_v1.types import (
     BatchDocumentsInputConfig,
@@ -21,6 +24,13 @@ from src.clients.gcs_client import GcsClient
 class DocumentAiClient:
     """A client for handling interactions with Google Cloud Document AI."""
 
+    # Merged chunk results are kept in memory up to this size before spilling to disk
+    SHARD_MERGE_SPOOL_MAX_BYTES = 64 * 1024 * 1024
+    # Size of each read from a result shard while stream-parsing it
+    SHARD_STREAM_READ_SIZE = 1024 * 1024
+    # Maximum wait for a batch operation (the default polling timeout of the sync client)
+    OPERATION_TIMEOUT_SECONDS = 900
+
     def __init__(self, config: AppConfig, gcs_client: GcsClient):
         self.config = config
         self.gcs_client = gcs_client
@@ -39,7 +49,9 @@ class DocumentAiClient:
             opts = ClientOptions(api_endpoint="documentai.googleapis.com")
         else:
             opts = ClientOptions(api_endpoint=f"{self.location}-documentai.googleapis.com")
-        self.client = documentai.DocumentProcessorServiceClient(client_options=opts)
+        # The async client polls long-running operations on the event loop, so a chunk waiting
+        # for Document AI does not hold an executor thread for the whole operation.
+        self.client = documentai.DocumentProcessorServiceAsyncClient(client_options=opts)
         self.semaphore = asyncio.Semaphore(config.max_concurrent_ai_requests)
         logging.info(f"DocumentAI Client initialized for processor '{self.processor_name}' in location '{self.location}'.")
         logging.info(f"DocumentAI concurrent request limit set to: {config.max_concurrent_ai_requests}")
@@ -63,6 +75,66 @@ class DocumentAiClient:
             for item in data:
                 self._adjust_text_anchors_recursive(item, offset)
 
+    def _merge_shards(self, shard_blob_names: List[str], merged_file) -> int:
+        """
+        Stream-merges the result shards of one document into merged_file as
+        {"documentLayout": {"blocks": [...]}, "text": "..."}. Each shard's blocks get their
+        text anchors shifted by the length of the preceding shards' text. Shards are parsed
+        incrementally, so only one top-level block (plus the shard text) is held in memory.
+
+        Args:
+            shard_blob_names: The shard blob names, in page order.
+            merged_file: A writable binary file-like object.
+
+        Returns:
+            The number of merged top-level blocks.
+        """
+        block_count = 0
+        text_offset = 0
+        merged_file.write(b'{"documentLayout":{"blocks":[')
+
+        with tempfile.SpooledTemporaryFile(max_size=self.SHARD_MERGE_SPOOL_MAX_BYTES) as text_file:
+            for blob_name in shard_blob_names:
+                blocks = ijson.sendable_list()
+                texts = ijson.sendable_list()
+                # The same bytes feed both parsers, so each shard is downloaded only once
+                blocks_parser = ijson.items_coro(blocks, "documentLayout.blocks.item", use_float=True)
+                text_parser = ijson.items_coro(texts, "text")
+                shard_block_count = block_count
+
+                def write_parsed_blocks():
+                    nonlocal block_count
+                    for block in blocks:
+                        self._adjust_text_anchors_recursive(block, text_offset)
+                        if block_count:
+                            merged_file.write(b",")
+                        merged_file.write(orjson.dumps(block))
+                        block_count += 1
+                    del blocks[:]
+
+                with self.gcs_client.open_blob_reader(blob_name) as reader:
+                    while data := reader.read(self.SHARD_STREAM_READ_SIZE):
+                        blocks_parser.send(data)
+                        text_parser.send(data)
+                        write_parsed_blocks()
+                blocks_parser.close()
+                text_parser.close()
+                write_parsed_blocks()
+
+                if block_count == shard_block_count:
+                    logging.warning(f"Shard {blob_name} has no 'documentLayout.blocks'; skipping its blocks.")
+
+                for shard_text in texts:
+                    text_file.write(orjson.dumps(shard_text)[1:-1])
+                    text_offset += len(shard_text)
+
+            merged_file.write(b']},"text":"')
+            text_file.seek(0)
+            shutil.copyfileobj(text_file, merged_file)
+            merged_file.write(b'"}')
+
+        return block_count
+
     async def process_document_chunk_async(self, gcs_input_uri: str, gcs_output_prefix: str) -> Optional[str]:
         """
         Processes a single document chunk from GCS using batch processing and saves the result.
@@ -81,7 +153,7 @@ class DocumentAiClient:
         gcs_output_json_path = f"{gcs_output_prefix}{output_json_filename}"
         
         # IDEMPOTENCY: Check if the result for this specific chunk already exists.
-        if self.gcs_client.blob_exists(gcs_output_json_path):
+        if await self.gcs_client.blob_exists_async(gcs_output_json_path):
             logging.info(f"Result for chunk '{gcs_input_uri}' already exists. Skipping processing.")
             return gcs_output_json_path
 
@@ -104,16 +176,16 @@ class DocumentAiClient:
             )
 
             try:
-                operation = self.client.batch_process_documents(request=request)
+                operation = await self.client.batch_process_documents(request=request)
                 logging.info(f"Waiting for Document AI operation for '{input_filename}' to complete...")
-                await asyncio.to_thread(operation.result)
+                await operation.result(timeout=self.OPERATION_TIMEOUT_SECONDS)
                 logging.info(f"Document AI operation for '{input_filename}' completed.")
                 
                 # Get precise output folder from metadata (e.g., output/doc_ai_results/{op_id}/0/)
                 from google.cloud.documentai_v1 import BatchProcessMetadata
                 metadata = BatchProcessMetadata(operation.metadata)
                 if not metadata.individual_process_statuses:
-                    logging.error(f"No process statuses found for operation {operation.name}")
+                    logging.error(f"No process statuses found for operation {operation.operation.name}")
                     return None
                 # Since one input document, take the first status
                 output_gcs_destination = metadata.individual_process_statuses[0].output_gcs_destination
@@ -127,36 +199,23 @@ class DocumentAiClient:
                     logging.error(f"No result JSONs found in output path: {output_folder}")
                     return None
                 
-                # Merge shards if multiple (sort by name for page order)
-                merged_data = {"text": "", "documentLayout": {"blocks": []}}
-                text_offset = 0
-                for blob in sorted(shard_blobs, key=lambda b: b.name):
-                    shard_content = json.loads(await asyncio.to_thread(blob.download_as_text))
-                    shard_text = shard_content.get("text", "")
-
-                    if "documentLayout" in shard_content and "blocks" in shard_content["documentLayout"]:
-                        blocks_to_process = shard_content["documentLayout"]["blocks"]
-                        self._adjust_text_anchors_recursive(blocks_to_process, text_offset)
-                        merged_data["documentLayout"]["blocks"].extend(blocks_to_process)
-                    else:
-                        logging.warning(f"Shard {blob.name} missing expected 'documentLayout.blocks'; skipping.")
+                # Merge shards if multiple (sort by name for page order), streaming them into a spooled file
+                shard_blob_names = sorted(b.name for b in shard_blobs)
+                with tempfile.SpooledTemporaryFile(max_size=self.SHARD_MERGE_SPOOL_MAX_BYTES) as merged_file:
+                    block_count = await asyncio.to_thread(self._merge_shards, shard_blob_names, merged_file)
                     
-                    merged_data["text"] += shard_text
-                    text_offset += len(shard_text)
-                
-                if not merged_data["documentLayout"]["blocks"]:
-                    logging.error(f"No valid blocks found after merging shards for '{input_filename}'")
-                    return None
-                
-                # Upload merged result to clean path
-                merged_json_str = json.dumps(merged_data, ensure_ascii=False)
-                await self.gcs_client.upload_from_string_async(merged_json_str, gcs_output_json_path)
+                    if not block_count:
+                        logging.error(f"No valid blocks found after merging shards for '{input_filename}'")
+                        return None
+                    
+                    # Upload merged result to clean path
+                    await self.gcs_client.upload_from_file_async(merged_file, gcs_output_json_path)
                 logging.info(f"Saved merged result for chunk to: {gcs_output_json_path}")
                 
                 # Clean up: Delete the raw shard files and any other blobs in the output folder
                 blobs_to_delete = [blob.name for blob in output_blobs]
                 if blobs_to_delete:
-                    self.gcs_client.bucket.delete_blobs(blobs_to_delete)
+                    await self.gcs_client.delete_blobs_async(blobs_to_delete)
                     logging.info(f"Deleted {len(blobs_to_delete)} raw shard files from {output_folder}")
                 
                 return gcs_output_json_path
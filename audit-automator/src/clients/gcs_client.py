@@ -1,12 +1,23 @@
 # src/clients/gcs_client.py
 import logging
 import asyncio
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+import google.auth
+from google.auth.transport.requests import AuthorizedSession
 from google.cloud import storage
+from google.cloud.storage import transfer_manager
+from requests.adapters import HTTPAdapter
 from src.config import AppConfig
 
 class GcsClient:
     """A client for all Google Cloud Storage interactions."""
 
+    # The GCS JSON API accepts at most 100 calls per batch request
+    MAX_DELETE_BATCH_SIZE = 100
+    # Kept-alive HTTP connections; covers the most concurrent GCS operations any stage issues
+    HTTP_POOL_MAXSIZE = 32
+
     def __init__(self, config: AppConfig):
         """
         Initializes the GCS client.
@@ -15,7 +26,21 @@ class GcsClient:
             config: The application configuration object.
         """
         self.config = config
-        self.storage_client = storage.Client(project=config.gcp_project_id)
+        # The default pool keeps only 10 connections per host; concurrent operations beyond
+        # that would open (and TLS-handshake) a new connection each time and then discard it.
+        # So the client gets an explicitly built session with a larger pool. mTLS is configured
+        # after mounting the pooled adapter, so a configured client certificate still takes
+        # precedence, as it does in the session storage.Client would create itself.
+        credentials, _ = google.auth.default(scopes=storage.Client.SCOPE)
+        http_session = AuthorizedSession(credentials)
+        http_session.mount("https://", HTTPAdapter(pool_connections=self.HTTP_POOL_MAXSIZE, pool_maxsize=self.HTTP_POOL_MAXSIZE))
+        http_session.configure_mtls_channel()
+        self.storage_client = storage.Client(project=config.gcp_project_id, credentials=credentials, _http=http_session)
+        # The *_async methods run on their own threads, one per pooled connection. The loop's
+        # default executor is sized by CPU count and busy with the asyncio.to_thread work
+        # (PDF chunk building, result stream-merging, block grouping), so GCS transfers
+        # queued behind that work would stall.
+        self._io_executor = ThreadPoolExecutor(max_workers=self.HTTP_POOL_MAXSIZE, thread_name_prefix="gcs-io")
         # We derive the bucket name from the config, which should be set by an env var
         # that comes from the terraform output.
         if not config.bucket_name:
@@ -45,11 +70,33 @@ class GcsClient:
         logging.debug(f"Downloading blob: {blob.name}")
         return blob.download_as_bytes()
 
+    def download_blob_to_filename(self, blob_name: str, filename: str, chunk_size: int = 32 * 1024 * 1024, max_workers: int = 8):
+        """
+        Downloads a blob to a local file using concurrent byte-range requests, without
+        buffering it in memory. Each range is written in place into the destination file.
+
+        Args:
+            blob_name: The full path of the object in the bucket.
+            filename: The local file path to write to (created or truncated).
+            chunk_size: The size of each byte range.
+            max_workers: The maximum number of concurrent range downloads.
+        """
+        logging.info(f"Downloading gs://{self.bucket.name}/{blob_name} to {filename}")
+        blob = self.bucket.blob(blob_name)
+        transfer_manager.download_chunks_concurrently(
+            blob, filename, chunk_size=chunk_size, worker_type=transfer_manager.THREAD, max_workers=max_workers
+        )
+
+    async def download_blob_to_filename_async(self, blob_name: str, filename: str):
+        """Asynchronously downloads a blob to a local file using concurrent byte-range requests."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._io_executor, self.download_blob_to_filename, blob_name, filename)
+
     async def upload_from_string_async(self, content: str, destination_blob_name: str, content_type: str = 'application/json'):
         """Asynchronously uploads a string content to a specified blob in GCS."""
         loop = asyncio.get_running_loop()
         await loop.run_in_executor(
-            None, self.upload_from_string, content, destination_blob_name, content_type
+            self._io_executor, self.upload_from_string, content, destination_blob_name, content_type
         )
 
     def upload_from_bytes(self, content: bytes, destination_blob_name: str, content_type: str = 'application/pdf'):
@@ -65,10 +112,30 @@ class GcsClient:
         blob = self.bucket.blob(destination_blob_name)
         blob.upload_from_string(content, content_type=content_type) # upload_from_string can handle bytes
 
+    def upload_from_file(self, file_obj, destination_blob_name: str, content_type: str = 'application/json'):
+        """
+        Synchronously uploads the content of a file-like object to a specified blob in GCS.
+        The object is rewound before the upload, so it can be passed right after writing.
+
+        Args:
+            file_obj: A readable, seekable binary file-like object.
+            destination_blob_name: The full path for the object in the bucket.
+            content_type: The MIME type of the content.
+        """
+        logging.info(f"Uploading file content to gs://{self.bucket.name}/{destination_blob_name}")
+        blob = self.bucket.blob(destination_blob_name)
+        blob.upload_from_file(file_obj, rewind=True, content_type=content_type)
+        logging.info(f"Upload complete for {destination_blob_name}.")
+
+    async def upload_from_file_async(self, file_obj, destination_blob_name: str, content_type: str = 'application/json'):
+        """Asynchronously uploads the content of a file-like object to a specified blob in GCS."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._io_executor, self.upload_from_file, file_obj, destination_blob_name, content_type)
+
     async def upload_from_bytes_async(self, content: bytes, destination_blob_name: str, content_type: str = 'application/pdf'):
         """Asynchronously uploads bytes content to a specified blob in GCS."""
         loop = asyncio.get_running_loop()
-        await loop.run_in_executor(None, self.upload_from_bytes, content, destination_blob_name, content_type)
+        await loop.run_in_executor(self._io_executor, self.upload_from_bytes, content, destination_blob_name, content_type)
 
     def upload_from_string(self, content: str, destination_blob_name: str, content_type: str = 'application/json'):
         """
@@ -88,15 +155,23 @@ class GcsClient:
         """Asynchronously downloads and parses a JSON file from GCS."""
         loop = asyncio.get_running_loop()
         # Use asyncio.to_thread in Python 3.9+ for a cleaner syntax
-        return await loop.run_in_executor(None, self.read_json, blob_name)
+        return await loop.run_in_executor(self._io_executor, self.read_json, blob_name)
 
     def read_json(self, blob_name: str) -> dict:
         """Downloads and parses a JSON file from GCS."""
-        import json
         logging.info(f"Attempting to read JSON from: gs://{self.bucket.name}/{blob_name}")
         blob = self.bucket.blob(blob_name)
-        content = blob.download_as_text() # This raises NotFound if not present.
-        return json.loads(content)
+        content = blob.download_as_bytes() # This raises NotFound if not present.
+        return orjson.loads(content)
+
+    def open_blob_reader(self, blob_name: str):
+        """
+        Opens a blob as a file-like reader that fetches content in chunks, so large
+        files can be parsed incrementally instead of being downloaded into memory first.
+        """
+        logging.info(f"Opening streaming reader for: gs://{self.bucket.name}/{blob_name}")
+        blob = self.bucket.blob(blob_name)
+        return blob.open("rb")
 
     def read_text_file(self, blob_name: str) -> str:
         """Downloads and returns the content of a text-based file from GCS."""
@@ -110,6 +185,28 @@ class GcsClient:
         blob = self.bucket.blob(blob_name)
         return blob.exists()
 
+    async def blob_exists_async(self, blob_name: str) -> bool:
+        """Asynchronously checks if a blob exists in the GCS bucket."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io_executor, self.blob_exists, blob_name)
+
+    def delete_blobs(self, blob_names: list[str]):
+        """
+        Deletes the given blobs using batch requests, so up to MAX_DELETE_BATCH_SIZE
+        deletions share one HTTP round trip. Failed deletions (e.g. blobs that no longer
+        exist) are not raised, as this is used for best-effort cleanup.
+        """
+        for i in range(0, len(blob_names), self.MAX_DELETE_BATCH_SIZE):
+            with self.storage_client.batch(raise_exception=False):
+                for blob_name in blob_names[i:i + self.MAX_DELETE_BATCH_SIZE]:
+                    self.bucket.blob(blob_name).delete()
+        logging.debug(f"Deleted {len(blob_names)} blobs from gs://{self.bucket.name}")
+
+    async def delete_blobs_async(self, blob_names: list[str]):
+        """Asynchronously deletes the given blobs using batch requests."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._io_executor, self.delete_blobs, blob_names)
+
     def copy_blob(self, source_blob_name: str, destination_blob_name: str):
         """Copies a blob within the same bucket."""
         source_blob = self.bucket.blob(source_blob_name)
@@ -120,5 +217,5 @@ class GcsClient:
         """Asynchronously copies a blob within the same bucket."""
         loop = asyncio.get_running_loop()
         await loop.run_in_executor(
-            None, self.copy_blob, source_blob_name, destination_blob_name
+            self._io_executor, self.copy_blob, source_blob_name, destination_blob_name
         )
\ No newline at end of file
@@ -1,7 +1,7 @@
 # src/clients/rag_client.py
 import logging
-import json
 import asyncio
+import orjson
 from typing import List, Dict, Any, Optional
 
 from google.cloud.exceptions import NotFound
@@ -10,6 +10,7 @@ from src.config import AppConfig
 from src.clients.gcs_client import GcsClient
 from src.clients.ai_client import AiClient
 from src.constants import DOCUMENT_CATEGORY_MAP_PATH, PROMPT_CONFIG_PATH
+from src.asset_loader import load_asset_json
 
 DOC_MAP_PATH = DOCUMENT_CATEGORY_MAP_PATH
 MAX_FILES_TEST_MODE = 3
@@ -29,7 +30,7 @@ class RagClient:
         self.ai_client = ai_client
         self._document_category_map: Optional[Dict[str, List[str]]] = None
         self._all_source_files: List[str] = []
-        self.prompt_config = self._load_asset_json(PROMPT_CONFIG_PATH)
+        self.prompt_config = load_asset_json(PROMPT_CONFIG_PATH)
 
     @classmethod
     async def create(cls, config: AppConfig, gcs_client: GcsClient, ai_client: AiClient, force_remap: bool = False):
@@ -44,9 +45,6 @@ class RagClient:
         self._all_source_files = [blob.name for blob in self.gcs_client.list_files()]
         await self._ensure_document_map_exists(force_remap=force_remap)
 
-    def _load_asset_json(self, path: str) -> dict:
-        with open(path, 'r', encoding='utf-8') as f: return json.load(f)
-
     async def _create_document_map(self) -> None:
         """
         Uses an AI model to classify source documents into predefined BSI categories
@@ -66,9 +64,9 @@ class RagClient:
 
         etl_config = self.prompt_config["stages"]["ETL"]["classify_documents"]
         prompt_template = etl_config["prompt"]
-        schema = self._load_asset_json(etl_config["schema_path"])
+        schema = load_asset_json(etl_config["schema_path"])
         
-        filenames_json = json.dumps(filenames, indent=2)
+        filenames_json = orjson.dumps(filenames, option=orjson.OPT_INDENT_2).decode()
         prompt = prompt_template.format(filenames_json=filenames_json)
 
         try:
@@ -85,7 +83,7 @@ class RagClient:
                 else:
                     logging.warning(f"AI returned a filename '{basename}' not found in the source file list. It will be ignored.")
 
-            content_to_upload = json.dumps(classification_result, indent=2, ensure_ascii=False)
+            content_to_upload = orjson.dumps(classification_result, option=orjson.OPT_INDENT_2)
             logging.info("Successfully created document map via AI with full file paths.")
 
         except Exception as e:
@@ -96,11 +94,12 @@ class RagClient:
                 exc_info=True
             )
             fallback_map = {"document_map": [{"filename": full_path, "category": "Sonstiges"} for full_path in self._all_source_files]}
-            content_to_upload = json.dumps(fallback_map, indent=2, ensure_ascii=False)
+            content_to_upload = orjson.dumps(fallback_map, option=orjson.OPT_INDENT_2)
         
-        self.gcs_client.upload_from_string(
+        self.gcs_client.upload_from_bytes(
             content=content_to_upload,
-            destination_blob_name=DOC_MAP_PATH
+            destination_blob_name=DOC_MAP_PATH,
+            content_type='application/json'
         )
         logging.info(f"Saved document map to '{DOC_MAP_PATH}'.")
 
@@ -57,14 +57,16 @@ async def main_async():
     args = parser.parse_args()
 
     gcs_client = GcsClient(config)
-    ai_client = AiClient(config)
 
     if args.generate_report:
         logging.info("Starting final report assembly...")
         generator = ReportGenerator(config, gcs_client)
         await generator.assemble_report()
         return
-        
+
+    # Only the AI-driven tasks below need Vertex AI; report assembly skips its setup
+    ai_client = AiClient(config)
+
     # For all other tasks, we need the RagClient (Document Finder)
     logging.info("Initializing Document Finder Client...")
     try: